@@ -0,0 +1,183 @@
+"""End-to-end job throughput against a fake Statusbrew API and a recording BigQuery client.
+
+    PYTHONPATH=src python benchmarks/bench_jobs.py [--sizes 10,1000,10000] [--baseline FILE]
+
+Each scenario (job x profile count) runs in a fresh process so peak RSS is
+its own. With ``--baseline`` the results are compared against a previous
+``--output`` file and the script exits non-zero when wall time or request
+count grows, or rows/sec drops, by more than ``--threshold``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+from datetime import date
+from typing import Dict, List
+
+from fakes import FakeStatusbrewConfig, FakeStatusbrewTransport, RecordingBigQueryClient
+from statusbrew_pipeline.bq import BigQueryService
+from statusbrew_pipeline.config import Settings
+from statusbrew_pipeline.jobs import JobRunner
+from statusbrew_pipeline.statusbrew_client import StatusbrewClient
+
+JOBS = ("profile_daily", "post_snapshots", "follower_demographics")
+RUN_DATE = date(2025, 3, 1)
+
+
+class _SilentNotifier:
+    def notify(self, text: str) -> None:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(job: str, profiles: int, options: dict) -> dict:
+    # Injected 503s would otherwise log one warning per retry.
+    logging.getLogger("statusbrew_pipeline").setLevel(logging.ERROR)
+    profiles_per_space = min(profiles, options["profiles_per_space"])
+    config = FakeStatusbrewConfig(
+        spaces=-(-profiles // profiles_per_space),
+        profiles_per_space=profiles_per_space,
+        latency_seconds=options["latency_ms"] / 1000,
+        error_rate=options["error_rate"],
+        posts_per_profile=options["posts_per_profile"],
+        padding_bytes=options["padding_bytes"],
+    )
+    transport = FakeStatusbrewTransport(config)
+    settings = Settings(
+        gcp_project="bench",
+        space_ids=",".join(transport.space_ids),
+        statusbrew_access_token="bench",
+    )
+    statusbrew = StatusbrewClient(
+        base_url="https://statusbrew.bench",
+        access_token="bench",
+        max_concurrency=options["concurrency"],
+        max_concurrency_per_space=options["concurrency_per_space"],
+        transport=transport,
+    )
+    client = RecordingBigQueryClient()
+    bq = BigQueryService(
+        project="bench",
+        dataset="bench",
+        table_profile_daily=settings.table_profile_daily,
+        table_post_snapshots=settings.table_post_snapshots,
+        table_demographics=settings.table_demographics,
+        client=client,
+    )
+    runner = JobRunner(settings, statusbrew, bq, _SilentNotifier())
+    run = {
+        "profile_daily": runner.run_profile_daily,
+        "post_snapshots": runner.run_post_snapshots,
+        "follower_demographics": runner.run_follower_demographics,
+        "daily": runner.run_daily,
+    }[job]
+
+    start = time.perf_counter()
+    result = run(RUN_DATE)
+    wall = time.perf_counter() - start
+    return {
+        "job": job,
+        "profiles": config.spaces * profiles_per_space,
+        "wall_seconds": round(wall, 3),
+        "requests": transport.requests,
+        "errors": transport.errors,
+        "rows": client.loaded_rows,
+        "rows_per_second": round(client.loaded_rows / wall, 1) if wall else 0.0,
+        "loaded_mb": round(client.loaded_bytes / (1024 * 1024), 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "timings": result.get("timings", {}),
+    }
+
+
+def _run_isolated(job: str, profiles: int, options: dict) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_scenario, (job, profiles, options))
+
+
+def _key(result: dict) -> str:
+    return f"{result['job']}@{result['profiles']}"
+
+
+def regressions(results: List[dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    found = []
+    for result in results:
+        previous = baseline.get(_key(result))
+        if previous is None:
+            continue
+        for metric in ("wall_seconds", "requests"):
+            if previous[metric] and result[metric] > previous[metric] * (1 + threshold):
+                found.append(f"{_key(result)} {metric} {previous[metric]} -> {result[metric]}")
+        if result["rows_per_second"] < previous["rows_per_second"] * (1 - threshold):
+            found.append(
+                f"{_key(result)} rows_per_second {previous['rows_per_second']} -> {result['rows_per_second']}"
+            )
+    return found
+
+
+def _print_table(results: List[dict]) -> None:
+    print(f"{'scenario':<32}{'wall s':>9}{'requests':>10}{'rows':>10}{'rows/s':>11}{'peak MB':>9}")
+    for result in results:
+        print(
+            f"{_key(result):<32}{result['wall_seconds']:>9.2f}{result['requests']:>10}"
+            f"{result['rows']:>10}{result['rows_per_second']:>11.0f}{result['peak_rss_mb']:>9.1f}"
+        )
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma-separated profile counts")
+    parser.add_argument("--jobs", default=",".join(JOBS), help="also accepts daily")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--posts-per-profile", type=int, default=3)
+    parser.add_argument("--padding-bytes", type=int, default=0, help="extra bytes per fake API record")
+    parser.add_argument("--profiles-per-space", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--concurrency-per-space", type=int, default=4)
+    parser.add_argument("--output", help="write results as JSON (usable as a later --baseline)")
+    parser.add_argument("--baseline", help="JSON written by an earlier --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    options = {
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "posts_per_profile": args.posts_per_profile,
+        "padding_bytes": args.padding_bytes,
+        "profiles_per_space": args.profiles_per_space,
+        "concurrency": args.concurrency,
+        "concurrency_per_space": args.concurrency_per_space,
+    }
+    results = [
+        _run_isolated(job, int(size), options)
+        for size in args.sizes.split(",")
+        for job in args.jobs.split(",")
+    ]
+    _print_table(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"options": options, "results": {_key(result): result for result in results}}, handle, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+        found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
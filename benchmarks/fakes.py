@@ -0,0 +1,154 @@
+"""Offline stand-ins for the Statusbrew API and the BigQuery client used by the benchmarks."""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List
+
+import httpx
+import pyarrow.parquet as pq
+
+
+@dataclass
+class FakeStatusbrewConfig:
+    spaces: int
+    profiles_per_space: int
+    latency_seconds: float = 0.0
+    error_rate: float = 0.0
+    posts_per_profile: int = 3
+    demographic_buckets: int = 20
+    padding_bytes: int = 0
+    seed: int = 0
+
+
+class FakeStatusbrewTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """In-process Statusbrew profiles and insights API for both sync and async clients.
+
+    Every request waits ``latency_seconds`` (``asyncio.sleep`` on the async
+    path so the fan-out stays concurrent) and fails with a retryable 503 at
+    ``error_rate``; ``padding_bytes`` inflates each record.
+    """
+
+    def __init__(self, config: FakeStatusbrewConfig):
+        self.config = config
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._padding = "x" * config.padding_bytes
+
+    @property
+    def space_ids(self) -> List[str]:
+        return [f"space-{index}" for index in range(self.config.spaces)]
+
+    def _fails(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.config.error_rate
+            self.errors += failed
+            return failed
+
+    def _record(self, **values) -> dict:
+        if self._padding:
+            values["padding"] = self._padding
+        return values
+
+    def _insights(self, body: dict) -> List[dict]:
+        filters = body.get("filters", {})
+        profile_ids = filters.get("profile_ids", [])
+        since = date.fromisoformat(body["time_range"]["since"])
+        until = date.fromisoformat(body["time_range"]["until"])
+        dimensions = body["dimensions"]
+        if "post" in dimensions:
+            published = (until - timedelta(days=1)).isoformat() + "T09:00:00+00:00"
+            return [
+                self._record(
+                    post=f"{profile_id}-post-{index}",
+                    profile=profile_id,
+                    post_created_at=published,
+                    metrics={"post_reach": 100 + index, "post_impressions": 200, "post_reactions": index},
+                )
+                for profile_id in profile_ids
+                for index in range(self.config.posts_per_profile)
+            ]
+        if "gender" in dimensions:
+            return [
+                self._record(
+                    profile=profile_id,
+                    dimensions={"age": f"{18 + bucket}-{19 + bucket}", "gender": "F", "country": "JP", "city": "Tokyo"},
+                    metrics={"followers": bucket},
+                )
+                for profile_id in profile_ids
+                for bucket in range(self.config.demographic_buckets)
+            ]
+        days = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+        return [
+            self._record(date=str(day), profile=profile_id, metrics={"followers": 1000, "reach": 50, "impressions": 80})
+            for profile_id in profile_ids
+            for day in days
+        ]
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        if self._fails():
+            return httpx.Response(503, headers={"Retry-After": "0.01"})
+        space_id = request.url.path.split("/")[3]
+        if request.url.path.endswith("/social_profiles"):
+            profiles = [
+                {"id": f"{space_id}-p{index}", "platform": "instagram", "username": f"user{index}"}
+                for index in range(self.config.profiles_per_space)
+            ]
+            return httpx.Response(200, json={"data": profiles})
+        return httpx.Response(200, json={"data": self._insights(json.loads(request.content))})
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.config.latency_seconds:
+            time.sleep(self.config.latency_seconds)
+        return self._respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.config.latency_seconds:
+            await asyncio.sleep(self.config.latency_seconds)
+        return self._respond(request)
+
+
+class _FinishedJob:
+    total_bytes_processed = 0
+    slot_millis = 0
+
+    def result(self):
+        return []
+
+
+class RecordingBigQueryClient:
+    """``google.cloud.bigquery.Client`` stand-in behind a real ``BigQueryService``.
+
+    Loads are decoded so Parquet encoding is exercised end to end; queries are
+    recorded and return no rows.
+    """
+
+    def __init__(self):
+        self.loaded_rows = 0
+        self.loaded_bytes = 0
+        self.queries = 0
+
+    def create_table(self, table):
+        return table
+
+    def load_table_from_file(self, file_obj, destination, job_config=None):
+        payload = file_obj.read()
+        self.loaded_bytes += len(payload)
+        self.loaded_rows += pq.read_metadata(io.BytesIO(payload)).num_rows
+        return _FinishedJob()
+
+    def query(self, query, job_config=None):
+        self.queries += 1
+        return _FinishedJob()
+
+    def delete_table(self, table, not_found_ok=False):
+        pass
@@ -0,0 +1,83 @@
+-- Monthly summary table, used when TABLE_MONTHLY_SUMMARY is set.
+-- Apply after views.sql and before deploying with the setting enabled.
+
+-- Maintained by the pipeline; only months touched by a write are recomputed.
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.sb_ig_profile_monthly_summary`
+PARTITION BY month_start
+CLUSTER BY profile_id AS
+SELECT
+  "" AS month,
+  DATE '1970-01-01' AS month_start,
+  "" AS profile_id,
+  "" AS profile_username,
+  CAST(NULL AS INT64) AS followers_closing,
+  CAST(NULL AS INT64) AS reach_total_all,
+  CAST(NULL AS INT64) AS reach_total_organic,
+  CAST(NULL AS INT64) AS reach_total_paid,
+  CAST(NULL AS INT64) AS profile_views_total,
+  CAST(NULL AS INT64) AS hp_clicks_total,
+  CAST(NULL AS FLOAT64) AS post_avg_reach,
+  CURRENT_TIMESTAMP() AS updated_at
+LIMIT 0;
+
+-- Existing deployments: seed the summary of every month already in the daily table (idempotent).
+MERGE `${PROJECT_ID}.${DATASET}.sb_ig_profile_monthly_summary` AS T
+USING (
+  WITH post_avg AS (
+    SELECT
+      profile_id,
+      DATE_TRUNC(DATE(post_published_at), MONTH) AS month_start,
+      AVG(reach_total) AS post_avg_reach
+    FROM `${PROJECT_ID}.${DATASET}.sb_ig_post_daily_snapshots`
+    WHERE DATE_DIFF(snapshot_date, DATE(post_published_at), DAY) = 7
+    GROUP BY profile_id, month_start
+  ),
+  base AS (
+    SELECT
+      DATE_TRUNC(date, MONTH) AS month_start,
+      profile_id,
+      profile_username,
+      ARRAY_AGG(followers ORDER BY date DESC LIMIT 1)[OFFSET(0)] AS followers_closing,
+      SUM(reach_total) AS reach_total_all,
+      SUM(reach_organic) AS reach_total_organic,
+      SUM(reach_paid) AS reach_total_paid,
+      SUM(profile_views) AS profile_views_total,
+      SUM(bio_link_clicks) AS hp_clicks_total
+    FROM `${PROJECT_ID}.${DATASET}.sb_ig_profile_daily_metrics`
+    GROUP BY month_start, profile_id, profile_username
+  )
+  SELECT
+    FORMAT_DATE('%Y-%m', base.month_start) AS month,
+    base.month_start,
+    base.profile_id,
+    base.profile_username,
+    base.followers_closing,
+    base.reach_total_all,
+    base.reach_total_organic,
+    base.reach_total_paid,
+    base.profile_views_total,
+    base.hp_clicks_total,
+    post_avg.post_avg_reach,
+    CURRENT_TIMESTAMP() AS updated_at
+  FROM base
+  LEFT JOIN post_avg
+    ON post_avg.profile_id = base.profile_id
+    AND post_avg.month_start = base.month_start
+) AS S
+ON T.month_start = S.month_start AND T.profile_id = S.profile_id
+WHEN NOT MATCHED THEN INSERT ROW;
+
+-- Read the monthly summary from the table instead of aggregating every daily row.
+CREATE OR REPLACE VIEW `${PROJECT_ID}.${DATASET}.vw_ig_profile_monthly_summary` AS
+SELECT
+  month,
+  profile_id,
+  profile_username,
+  followers_closing,
+  reach_total_all,
+  reach_total_organic,
+  reach_total_paid,
+  profile_views_total,
+  hp_clicks_total,
+  post_avg_reach
+FROM `${PROJECT_ID}.${DATASET}.sb_ig_profile_monthly_summary`;
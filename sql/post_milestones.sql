@@ -0,0 +1,60 @@
+-- Post snapshots at configured ages, used when TABLE_POST_MILESTONES is set.
+-- Apply after views.sql with POST_MILESTONES exported (e.g. 1,3,7,30; must include 7).
+
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.sb_ig_post_milestones`
+PARTITION BY snapshot_date
+CLUSTER BY milestone_day, profile_id AS
+SELECT
+  CAST(NULL AS INT64) AS milestone_day,
+  DATE '1970-01-01' AS snapshot_date,
+  "" AS space_id,
+  "" AS profile_id,
+  "" AS profile_username,
+  "" AS post_id,
+  "" AS post_permalink,
+  "" AS post_type,
+  TIMESTAMP('1970-01-01 00:00:00') AS post_published_at,
+  CAST(NULL AS INT64) AS reach_total,
+  CAST(NULL AS INT64) AS impressions_total,
+  CAST(NULL AS INT64) AS likes,
+  CAST(NULL AS INT64) AS comments,
+  CAST(NULL AS INT64) AS shares,
+  CAST(NULL AS INT64) AS saves,
+  CAST(NULL AS INT64) AS follows,
+  CAST(NULL AS INT64) AS profile_activity_total,
+  CAST(NULL AS INT64) AS bio_link_clicks,
+  CURRENT_TIMESTAMP() AS created_at
+LIMIT 0;
+
+-- Existing deployments: seed milestones from snapshot history (idempotent).
+MERGE `${PROJECT_ID}.${DATASET}.sb_ig_post_milestones` AS T
+USING (
+  SELECT
+    DATE_DIFF(snapshot_date, DATE(post_published_at), DAY) AS milestone_day,
+    * EXCEPT (metrics_fingerprint)
+  FROM `${PROJECT_ID}.${DATASET}.sb_ig_post_daily_snapshots`
+  WHERE DATE_DIFF(snapshot_date, DATE(post_published_at), DAY) IN UNNEST([${POST_MILESTONES}])
+) AS S
+ON T.snapshot_date = S.snapshot_date AND T.post_id = S.post_id AND T.milestone_day = S.milestone_day
+WHEN NOT MATCHED THEN INSERT ROW;
+
+-- Read day-7 metrics from the milestone table instead of scanning every snapshot.
+CREATE OR REPLACE VIEW `${PROJECT_ID}.${DATASET}.vw_ig_post_day7_metrics` AS
+SELECT
+  post_id,
+  profile_id,
+  profile_username,
+  post_permalink,
+  post_type,
+  post_published_at,
+  reach_total AS reach_total_day7,
+  impressions_total AS impressions_total_day7,
+  likes AS likes_day7,
+  comments AS comments_day7,
+  shares AS shares_day7,
+  saves AS saves_day7,
+  follows AS follows_day7,
+  profile_activity_total AS profile_activity_total_day7,
+  bio_link_clicks AS bio_link_clicks_day7
+FROM `${PROJECT_ID}.${DATASET}.sb_ig_post_milestones`
+WHERE milestone_day = 7;
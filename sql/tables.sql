@@ -45,9 +45,14 @@ SELECT
   CAST(NULL AS INT64) AS follows,
   CAST(NULL AS INT64) AS profile_activity_total,
   CAST(NULL AS INT64) AS bio_link_clicks,
+  CAST(NULL AS STRING) AS metrics_fingerprint,
   CURRENT_TIMESTAMP() AS created_at
 LIMIT 0;
 
+-- Existing deployments: add the change-detection fingerprint column.
+ALTER TABLE `${PROJECT_ID}.${DATASET}.sb_ig_post_daily_snapshots`
+ADD COLUMN IF NOT EXISTS metrics_fingerprint STRING;
+
 
 CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics`
 PARTITION BY snapshot_date
@@ -64,3 +69,104 @@ SELECT
   CAST(NULL AS INT64) AS followers,
   CURRENT_TIMESTAMP() AS created_at
 LIMIT 0;
+
+
+-- Change-only demographics (used when TABLE_DEMOGRAPHICS_HISTORY is set): one row per
+-- breakdown value, valid from valid_from until the day before valid_to (NULL = current).
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics_history`
+PARTITION BY valid_from
+CLUSTER BY profile_id, valid_to AS
+SELECT
+  DATE '1970-01-01' AS valid_from,
+  CAST(NULL AS DATE) AS valid_to,
+  "" AS space_id,
+  "" AS profile_id,
+  "" AS profile_username,
+  "" AS age_group,
+  "" AS gender,
+  "" AS country,
+  "" AS city,
+  CAST(NULL AS INT64) AS followers,
+  CURRENT_TIMESTAMP() AS created_at,
+  CURRENT_TIMESTAMP() AS updated_at
+LIMIT 0;
+
+-- Existing deployments: build the history from sb_ig_follower_demographics before enabling
+-- TABLE_DEMOGRAPHICS_HISTORY. A range starts on a day whose value differs from (or is missing on)
+-- the profile's previous snapshot and ends on the snapshot after its last day. Runs only while
+-- the history table is empty.
+INSERT INTO `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics_history` (
+  valid_from, valid_to, space_id, profile_id, profile_username, age_group, gender, country, city,
+  followers, created_at, updated_at
+)
+WITH profile_days AS (
+  SELECT
+    profile_id,
+    snapshot_date,
+    LAG(snapshot_date) OVER (PARTITION BY profile_id ORDER BY snapshot_date) AS previous_day,
+    LEAD(snapshot_date) OVER (PARTITION BY profile_id ORDER BY snapshot_date) AS next_day
+  FROM (
+    SELECT DISTINCT profile_id, snapshot_date
+    FROM `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics`
+  )
+),
+marked AS (
+  SELECT
+    d.*,
+    prev.profile_id IS NULL AS is_start
+  FROM `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics` d
+  JOIN profile_days days
+    ON days.profile_id = d.profile_id
+    AND days.snapshot_date = d.snapshot_date
+  LEFT JOIN `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics` prev
+    ON prev.profile_id = d.profile_id
+    AND prev.snapshot_date = days.previous_day
+    AND prev.age_group = d.age_group
+    AND prev.gender = d.gender
+    AND prev.country = d.country
+    AND prev.city = d.city
+    AND prev.followers IS NOT DISTINCT FROM d.followers
+),
+runs AS (
+  SELECT
+    *,
+    COUNTIF(is_start) OVER (
+      PARTITION BY profile_id, age_group, gender, country, city ORDER BY snapshot_date
+    ) AS run
+  FROM marked
+),
+ranges AS (
+  SELECT
+    profile_id,
+    age_group,
+    gender,
+    country,
+    city,
+    MIN(snapshot_date) AS valid_from,
+    MAX(snapshot_date) AS last_day,
+    ARRAY_AGG(
+      STRUCT(space_id, profile_username, followers, created_at) ORDER BY snapshot_date LIMIT 1
+    )[OFFSET(0)] AS opened
+  FROM runs
+  GROUP BY profile_id, age_group, gender, country, city, run
+)
+SELECT
+  ranges.valid_from,
+  days.next_day AS valid_to,
+  ranges.opened.space_id,
+  ranges.profile_id,
+  ranges.opened.profile_username,
+  ranges.age_group,
+  ranges.gender,
+  ranges.country,
+  ranges.city,
+  ranges.opened.followers,
+  ranges.opened.created_at,
+  CURRENT_TIMESTAMP() AS updated_at
+FROM ranges
+JOIN profile_days days
+  ON days.profile_id = ranges.profile_id
+  AND days.snapshot_date = ranges.last_day
+WHERE NOT EXISTS (
+  SELECT 1 FROM `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics_history`
+);
@@ -65,3 +65,40 @@ LEFT JOIN post_avg
   ON post_avg.profile_id = base.profile_id
   AND post_avg.month = FORMAT_DATE('%Y-%m', base.date)
 GROUP BY month, profile_id, profile_username;
+
+
+-- Follower demographics snapshot of any day from the change-only history table.
+CREATE OR REPLACE TABLE FUNCTION `${PROJECT_ID}.${DATASET}.tvf_ig_follower_demographics_on`(day DATE) AS
+SELECT
+  day AS snapshot_date,
+  space_id,
+  profile_id,
+  profile_username,
+  age_group,
+  gender,
+  country,
+  city,
+  followers,
+  created_at
+FROM `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics_history`
+WHERE valid_from <= day
+  AND (valid_to IS NULL OR valid_to > day);
+
+
+-- Same shape as sb_ig_follower_demographics (one row per snapshot day) for existing queries;
+-- filter on snapshot_date, or use the table function above for a single day.
+-- Current rows run to today in the pipeline's TIMEZONE (Asia/Tokyo), not UTC.
+CREATE OR REPLACE VIEW `${PROJECT_ID}.${DATASET}.vw_ig_follower_demographics_daily` AS
+SELECT
+  snapshot_date,
+  space_id,
+  profile_id,
+  profile_username,
+  age_group,
+  gender,
+  country,
+  city,
+  followers,
+  created_at
+FROM `${PROJECT_ID}.${DATASET}.sb_ig_follower_demographics_history`,
+  UNNEST(GENERATE_DATE_ARRAY(valid_from, COALESCE(DATE_SUB(valid_to, INTERVAL 1 DAY), CURRENT_DATE('Asia/Tokyo')))) AS snapshot_date;
@@ -1,20 +1,265 @@
 from __future__ import annotations
 
+import io
 import logging
 import uuid
-from typing import List
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import pyarrow.compute as pc
 
 from google.cloud import bigquery
 
+from .columnar import ColumnarBatch, table_to_parquet
+from .metrics import observe_query_job, timed
 from .table_schemas import (
     PROFILE_DAILY_SCHEMA,
     POST_SNAPSHOT_SCHEMA,
+    POST_MILESTONE_SCHEMA,
     FOLLOWER_DEMOGRAPHICS_SCHEMA,
+    FOLLOWER_DEMOGRAPHICS_HISTORY_SCHEMA,
 )
 
 
 logger = logging.getLogger(__name__)
 
+QueryParameter = Union[bigquery.ArrayQueryParameter, bigquery.ScalarQueryParameter]
+
+WRITE_MODE_MERGE = "merge"
+WRITE_MODE_REPLACE_PARTITIONS = "replace_partitions"
+WRITE_MODE_CHANGES_ONLY = "changes_only"
+
+# Days after publishing whose post snapshot feeds the monthly ``post_avg_reach``.
+SUMMARY_POST_DAY = 7
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """How one pipeline table is keyed, partitioned and written."""
+
+    kind: str
+    label: str
+    schema: Sequence[bigquery.SchemaField]
+    partition_column: str
+    key_columns: Tuple[str, ...]
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.name for field in self.schema]
+
+    @property
+    def update_columns(self) -> List[str]:
+        return [c for c in self.columns if c not in set(self.key_columns) | {"created_at"}]
+
+
+PROFILE_DAILY = TableSpec(
+    kind="profile_daily",
+    label="profile daily metrics",
+    schema=PROFILE_DAILY_SCHEMA,
+    partition_column="date",
+    key_columns=("date", "profile_id"),
+)
+POST_SNAPSHOTS = TableSpec(
+    kind="post_snapshots",
+    label="post snapshots",
+    schema=POST_SNAPSHOT_SCHEMA,
+    partition_column="snapshot_date",
+    key_columns=("snapshot_date", "post_id"),
+)
+POST_MILESTONES = TableSpec(
+    kind="post_milestones",
+    label="post milestones",
+    schema=POST_MILESTONE_SCHEMA,
+    partition_column="snapshot_date",
+    key_columns=("snapshot_date", "post_id", "milestone_day"),
+)
+DEMOGRAPHICS = TableSpec(
+    kind="demographics",
+    label="demographics",
+    schema=FOLLOWER_DEMOGRAPHICS_SCHEMA,
+    partition_column="snapshot_date",
+    key_columns=("snapshot_date", "profile_id", "age_group", "gender", "country", "city"),
+)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _month_end(day: date) -> date:
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _transaction_script(statements: Sequence[str], trailer: Sequence[str] = ()) -> str:
+    """Wrap ``statements`` in one transaction that rolls back and re-raises on error."""
+    return "\n".join(
+        ["BEGIN", "  BEGIN TRANSACTION;"]
+        + [f"  {statement}" for statement in statements]
+        + [
+            "  COMMIT TRANSACTION;",
+            "EXCEPTION WHEN ERROR THEN",
+            "  ROLLBACK TRANSACTION;",
+            "  RAISE USING MESSAGE = @@error.message;",
+            "END;",
+        ]
+        + list(trailer)
+    )
+
+
+TABLE_SPECS: Dict[str, TableSpec] = {
+    spec.kind: spec for spec in (PROFILE_DAILY, POST_SNAPSHOTS, POST_MILESTONES, DEMOGRAPHICS)
+}
+
+
+@dataclass
+class StagedTable:
+    """A loaded temporary table and the target partitions its rows fall into."""
+
+    name: str
+    row_count: int
+    partitions: List[date]
+
+    def to_dict(self, spec: TableSpec) -> dict:
+        return {
+            "kind": spec.kind,
+            "name": self.name,
+            "row_count": self.row_count,
+            "partitions": [str(partition) for partition in self.partitions],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> Tuple[TableSpec, "StagedTable"]:
+        """Inverse of :meth:`to_dict`; raises ``ValueError`` for an unknown table kind."""
+        spec = TABLE_SPECS.get(payload["kind"])
+        if spec is None:
+            raise ValueError(f"Unknown table kind {payload['kind']!r}")
+        staged = cls(
+            name=payload["name"],
+            row_count=int(payload["row_count"]),
+            partitions=[date.fromisoformat(partition) for partition in payload["partitions"]],
+        )
+        return spec, staged
+
+
+def _arrow_chunks(rows: Iterable[dict], schema: List[bigquery.SchemaField], size: int) -> Iterator:
+    """Buffer ``rows`` column-wise and yield one Arrow table per ``size`` rows.
+
+    Every chunk of one call shares a single ``created_at`` stamp.
+    """
+    created_at = datetime.now(timezone.utc)
+    batch = ColumnarBatch(schema)
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch.to_arrow(created_at)
+            batch.clear()
+    if len(batch):
+        yield batch.to_arrow(created_at)
+
+
+class WriteBatch:
+    """Staged rows for several tables, written by one transactional script.
+
+    ``stage`` loads rows into auto-expiring staging tables; ``commit`` runs
+    every pending MERGE (or partition replace) inside a single
+    ``BEGIN TRANSACTION ... COMMIT`` script and drops the staging tables in
+    the same round trip. The monthly summary rows of every month the staged
+    rows touch are recomputed inside the same transaction. Staging tables
+    left behind by a crash expire on their own. Used as a context manager it
+    commits on success.
+    """
+
+    def __init__(self, service: "BigQueryService", partial: bool = False):
+        self.service = service
+        self.partial = partial
+        self.staged: List[Tuple[TableSpec, StagedTable]] = []
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def stage(self, spec: TableSpec, rows: Iterable[dict]) -> int:
+        staged = self.service._load_temp_table(rows, spec)
+        if staged is None:
+            logger.info("No %s to upsert.", spec.label)
+            return 0
+        self.staged.append((spec, staged))
+        return staged.row_count
+
+    def adopt(self, spec: TableSpec, staged: StagedTable) -> int:
+        """Include a table staged elsewhere (for example by another shard) in this batch."""
+        self.staged.append((spec, staged))
+        return staged.row_count
+
+    def detach(self) -> List[Tuple[TableSpec, StagedTable]]:
+        """Hand the staged tables over to the caller; the batch no longer commits or drops them."""
+        staged, self.staged = self.staged, []
+        return staged
+
+    def _write_groups(self) -> List[Tuple[TableSpec, List[StagedTable]]]:
+        """Staged tables in write order, with those replacing partitions of one target grouped.
+
+        Several staged tables for the same partition-replace target (one per
+        shard, say) must share a single DELETE; otherwise each DELETE would
+        remove the rows the previous table's INSERT just wrote.
+        """
+        groups: List[Tuple[TableSpec, List[StagedTable]]] = []
+        replaced: Dict[str, List[StagedTable]] = {}
+        for spec, staged in self.staged:
+            if self.service.write_mode(spec, self.partial) != WRITE_MODE_REPLACE_PARTITIONS:
+                groups.append((spec, [staged]))
+                continue
+            target = self.service._target_table(spec)
+            if target not in replaced:
+                replaced[target] = []
+                groups.append((spec, replaced[target]))
+            replaced[target].append(staged)
+        return groups
+
+    def script(self) -> Tuple[str, List[QueryParameter]]:
+        statements: List[str] = []
+        parameters: List[QueryParameter] = []
+        months: Set[date] = set()
+        for index, (spec, tables) in enumerate(self._write_groups()):
+            parameter = f"partitions_{index}"
+            partitions = sorted({day for staged in tables for day in staged.partitions})
+            parameters.append(bigquery.ArrayQueryParameter(parameter, "DATE", partitions))
+            mode = self.service.write_mode(spec, self.partial)
+            statements.extend(self.service._write_statements(spec, tables, parameter, mode))
+            months.update(self.service.summary_months(spec, partitions))
+        if months:
+            summary_statements, summary_parameters = self.service._monthly_summary_statements(months)
+            statements.extend(summary_statements)
+            parameters.extend(summary_parameters)
+        drops = [f"DROP TABLE IF EXISTS `{self.service.table_path(staged.name)}`;" for _, staged in self.staged]
+        return _transaction_script(statements, drops), parameters
+
+    def commit(self) -> None:
+        if not self.staged:
+            return
+        script, parameters = self.script()
+        logger.debug("Running write script for %s staged tables", len(self.staged))
+        job_config = bigquery.QueryJobConfig(query_parameters=parameters)
+        with timed("bq_merge"):
+            query_job = self.service.client.query(script, job_config=job_config)
+            query_job.result()
+        observe_query_job(query_job)
+        for spec, staged in self.staged:
+            logger.info("Upserted %s rows into %s", staged.row_count, self.service._target_table(spec))
+        self.staged = []
+
+    def discard(self) -> None:
+        for _, staged in self.staged:
+            self.service.client.delete_table(self.service.table_path(staged.name), not_found_ok=True)
+        self.staged = []
+
 
 class BigQueryService:
     def __init__(
@@ -24,127 +269,311 @@ class BigQueryService:
         table_profile_daily: str,
         table_post_snapshots: str,
         table_demographics: str,
+        load_chunk_rows: int = 50_000,
+        client: Optional[bigquery.Client] = None,
+        partition_replace: Iterable[str] = (),
+        staging_expiration: timedelta = timedelta(hours=6),
+        table_monthly_summary: Optional[str] = None,
+        table_post_milestones: Optional[str] = None,
+        table_demographics_history: Optional[str] = None,
     ):
         self.project = project
         self.dataset = dataset
         self.table_profile_daily = table_profile_daily
         self.table_post_snapshots = table_post_snapshots
         self.table_demographics = table_demographics
-        self.client = bigquery.Client(project=project)
+        self.load_chunk_rows = max(1, load_chunk_rows)
+        self.partition_replace = set(partition_replace)
+        self.staging_expiration = staging_expiration
+        self.table_monthly_summary = table_monthly_summary
+        self.table_post_milestones = table_post_milestones
+        self.table_demographics_history = table_demographics_history
+        self.client = client or bigquery.Client(project=project)
 
     def table_path(self, table_name: str) -> str:
         return f"{self.project}.{self.dataset}.{table_name}"
 
-    def _load_temp_table(self, rows: List[dict], schema: List[bigquery.SchemaField]) -> str:
+    def _target_table(self, spec: TableSpec) -> str:
+        return {
+            PROFILE_DAILY.kind: self.table_profile_daily,
+            POST_SNAPSHOTS.kind: self.table_post_snapshots,
+            POST_MILESTONES.kind: self.table_post_milestones,
+            DEMOGRAPHICS.kind: self.table_demographics_history or self.table_demographics,
+        }[spec.kind]
+
+    def write_mode(self, spec: TableSpec, partial: bool = False) -> str:
+        """Tables listed in ``partition_replace`` fully own the partitions they write.
+
+        A ``partial`` write holds only some of a partition's rows (one
+        checkpoint chunk or one shard committing on its own), so it merges
+        instead of replacing the rows written by the others. Demographics go
+        change-only into ``table_demographics_history`` when one is configured.
+        """
+        if spec.kind == DEMOGRAPHICS.kind and self.table_demographics_history:
+            return WRITE_MODE_CHANGES_ONLY
+        if spec.kind in self.partition_replace and not partial:
+            return WRITE_MODE_REPLACE_PARTITIONS
+        return WRITE_MODE_MERGE
+
+    def write_batch(self, partial: bool = False) -> WriteBatch:
+        """A batch committing in one transaction; see :meth:`write_mode` for ``partial``."""
+        return WriteBatch(self, partial)
+
+    def _load_temp_table(self, rows: Iterable[dict], spec: TableSpec) -> Optional[StagedTable]:
+        """Stream ``rows`` into a new auto-expiring staging table ``load_chunk_rows`` at a time.
+
+        Each chunk is encoded as Parquet against the table schema and appended
+        with its own load job, so only one chunk is held in memory. Returns
+        ``None`` when ``rows`` was empty.
+        """
         temp_table_name = f"tmp_{uuid.uuid4().hex}"
         table_id = f"{self.project}.{self.dataset}.{temp_table_name}"
-        job_config = bigquery.LoadJobConfig(
-            schema=schema,
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-            autodetect=False,
+        row_count = 0
+        created = False
+        partitions: Set[date] = set()
+        try:
+            for chunk in _arrow_chunks(rows, spec.schema, self.load_chunk_rows):
+                if not created:
+                    table = bigquery.Table(table_id, schema=list(spec.schema))
+                    table.expires = datetime.now(timezone.utc) + self.staging_expiration
+                    self.client.create_table(table)
+                    created = True
+                job_config = bigquery.LoadJobConfig(
+                    schema=spec.schema,
+                    source_format=bigquery.SourceFormat.PARQUET,
+                    write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+                    autodetect=False,
+                )
+                payload = io.BytesIO(table_to_parquet(chunk))
+                with timed("bq_load"):
+                    load_job = self.client.load_table_from_file(payload, table_id, job_config=job_config)
+                    load_job.result()
+                row_count += chunk.num_rows
+                partitions.update(
+                    value for value in pc.unique(chunk.column(spec.partition_column)).to_pylist() if value
+                )
+        except Exception:
+            if created:
+                self.client.delete_table(table_id, not_found_ok=True)
+            raise
+        if not row_count:
+            return None
+        logger.debug("Loaded %s rows into staging table %s", row_count, table_id)
+        return StagedTable(name=temp_table_name, row_count=row_count, partitions=sorted(partitions))
+
+    def _write_statements(
+        self, spec: TableSpec, tables: Sequence[StagedTable], partitions_param: str, mode: str
+    ) -> List[str]:
+        """SQL writing the staged ``tables`` into their target, restricted to ``@partitions_param``.
+
+        Merge mode upserts by key with the partition filter in the ON clause
+        so only touched partitions are scanned; partition-replace mode deletes
+        the touched partitions once and then inserts the rows of every table.
+        """
+        target = self.table_path(self._target_table(spec))
+        columns = ", ".join(spec.columns)
+        if mode == WRITE_MODE_REPLACE_PARTITIONS:
+            return [f"DELETE FROM `{target}` WHERE {spec.partition_column} IN UNNEST(@{partitions_param});"] + [
+                f"INSERT INTO `{target}` ({columns}) SELECT {columns} FROM `{self.table_path(staged.name)}`;"
+                for staged in tables
+            ]
+        statements: List[str] = []
+        for staged in tables:
+            source = self.table_path(staged.name)
+            statements.extend(self._upsert_statements(spec, target, source, partitions_param, mode))
+        return statements
+
+    def _upsert_statements(
+        self, spec: TableSpec, target: str, source: str, partitions_param: str, mode: str
+    ) -> List[str]:
+        columns = ", ".join(spec.columns)
+        if mode == WRITE_MODE_CHANGES_ONLY:
+            return self._changes_only_statements(spec, target, source, partitions_param)
+        on_clause = " AND ".join(
+            [f"T.{col} = S.{col}" for col in spec.key_columns]
+            + [f"T.{spec.partition_column} IN UNNEST(@{partitions_param})"]
         )
-        load_job = self.client.load_table_from_json(rows, table_id, job_config=job_config)
-        load_job.result()
-        logger.debug("Loaded %s rows into temporary table %s", len(rows), table_id)
-        return temp_table_name
+        update_clause = ", ".join([f"{col}=S.{col}" for col in spec.update_columns])
+        insert_values = ", ".join([f"S.{col}" for col in spec.columns])
+        return [
+            f"MERGE `{target}` AS T USING `{source}` AS S ON {on_clause} "
+            f"WHEN MATCHED THEN UPDATE SET {update_clause} "
+            f"WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({insert_values});"
+        ]
 
-    def _merge(
-        self,
-        target_table: str,
-        temp_table: str,
-        key_columns: List[str],
-        all_columns: List[str],
-        update_columns: List[str] | None = None,
-    ) -> None:
-        on_clause = " AND ".join([f"T.{col} = S.{col}" for col in key_columns])
-        update_columns = update_columns or [c for c in all_columns if c not in key_columns]
-        update_clause = ", ".join([f"{col}=S.{col}" for col in update_columns])
-        insert_columns = ", ".join(all_columns)
-        insert_values = ", ".join([f"S.{col}" for col in all_columns])
-        query = f"""
-        MERGE `{self.table_path(target_table)}` AS T
-        USING `{self.table_path(temp_table)}` AS S
-        ON {on_clause}
-        WHEN MATCHED THEN
-          UPDATE SET {update_clause}
-        WHEN NOT MATCHED THEN
-          INSERT ({insert_columns})
-          VALUES ({insert_values})
+    @staticmethod
+    def _changes_only_statements(spec: TableSpec, target: str, source: str, partitions_param: str) -> List[str]:
+        """SQL applying a staged snapshot to a ``valid_from``/``valid_to`` history table.
+
+        For each profile in the snapshot, current rows whose value changed or
+        that are no longer reported are closed (``valid_to`` = snapshot date),
+        then rows that are new or changed are opened; unchanged rows are left
+        alone. A rerun of the same day leaves no zero-length ranges behind.
+        Snapshots must be applied in date order.
         """
-        logger.debug("Running merge for %s using %s", target_table, temp_table)
-        self.client.query(query).result()
-        logger.info("Upserted rows into %s", target_table)
 
-    def upsert_profile_daily(self, rows: List[dict]) -> None:
-        if not rows:
-            logger.info("No profile daily metrics to upsert.")
-            return
-        temp_table = self._load_temp_table(rows, PROFILE_DAILY_SCHEMA)
-        try:
-            self._merge(
-                target_table=self.table_profile_daily,
-                temp_table=temp_table,
-                key_columns=["date", "profile_id"],
-                all_columns=[field.name for field in PROFILE_DAILY_SCHEMA],
-                update_columns=[
-                    c
-                    for c in [field.name for field in PROFILE_DAILY_SCHEMA]
-                    if c not in {"date", "profile_id", "created_at"}
-                ],
-            )
-        finally:
-            self.client.delete_table(self.table_path(temp_table), not_found_ok=True)
-
-    def upsert_post_snapshots(self, rows: List[dict]) -> None:
-        if not rows:
-            logger.info("No post snapshots to upsert.")
-            return
-        temp_table = self._load_temp_table(rows, POST_SNAPSHOT_SCHEMA)
-        try:
-            self._merge(
-                target_table=self.table_post_snapshots,
-                temp_table=temp_table,
-                key_columns=["snapshot_date", "post_id"],
-                all_columns=[field.name for field in POST_SNAPSHOT_SCHEMA],
-                update_columns=[
-                    c
-                    for c in [field.name for field in POST_SNAPSHOT_SCHEMA]
-                    if c not in {"snapshot_date", "post_id", "created_at"}
-                ],
-            )
-        finally:
-            self.client.delete_table(self.table_path(temp_table), not_found_ok=True)
-
-    def upsert_demographics(self, rows: List[dict]) -> None:
-        if not rows:
-            logger.info("No demographics to upsert.")
-            return
-        temp_table = self._load_temp_table(rows, FOLLOWER_DEMOGRAPHICS_SCHEMA)
-        try:
-            self._merge(
-                target_table=self.table_demographics,
-                temp_table=temp_table,
-                key_columns=["snapshot_date", "profile_id", "age_group", "gender", "country", "city"],
-                all_columns=[field.name for field in FOLLOWER_DEMOGRAPHICS_SCHEMA],
-                update_columns=[
-                    c
-                    for c in [field.name for field in FOLLOWER_DEMOGRAPHICS_SCHEMA]
-                    if c
-                    not in {"snapshot_date", "profile_id", "age_group", "gender", "country", "city", "created_at"}
-                ],
-            )
-        finally:
-            self.client.delete_table(self.table_path(temp_table), not_found_ok=True)
-
-    def recent_posts(self, lookback_days: int) -> List[dict]:
+        def unchanged(new: str, old: str) -> str:
+            same_key = [f"{new}.{col} = {old}.{col}" for col in spec.key_columns if col != spec.partition_column]
+            return " AND ".join(same_key + [f"{new}.followers IS NOT DISTINCT FROM {old}.followers"])
+
+        history_columns = [field.name for field in FOLLOWER_DEMOGRAPHICS_HISTORY_SCHEMA]
+        opened = {"valid_from": "S.snapshot_date", "valid_to": "NULL", "updated_at": "S.created_at"}
+        select_list = ", ".join(opened.get(col, f"S.{col}") for col in history_columns)
+        return [
+            f"UPDATE `{target}` AS T SET valid_to = P.snapshot_date, updated_at = CURRENT_TIMESTAMP() "
+            f"FROM (SELECT DISTINCT profile_id, snapshot_date FROM `{source}`) AS P "
+            f"WHERE T.valid_to IS NULL AND T.profile_id = P.profile_id AND T.valid_from <= P.snapshot_date "
+            f"AND NOT EXISTS (SELECT 1 FROM `{source}` AS S "
+            f"WHERE S.snapshot_date = P.snapshot_date AND {unchanged('S', 'T')});",
+            f"INSERT INTO `{target}` ({', '.join(history_columns)}) SELECT {select_list} FROM `{source}` AS S "
+            f"WHERE NOT EXISTS (SELECT 1 FROM `{target}` AS T "
+            f"WHERE T.valid_to IS NULL AND {unchanged('S', 'T')});",
+            f"DELETE FROM `{target}` WHERE valid_from IN UNNEST(@{partitions_param}) AND valid_to <= valid_from;",
+        ]
+
+    def summary_months(self, spec: TableSpec, partitions: Iterable[date]) -> Set[date]:
+        """First days of the monthly summary months that writing ``partitions`` of ``spec`` affects.
+
+        Profile daily rows feed their own month; a post snapshot or milestone
+        feeds the month its post was published in when it is the
+        day-``SUMMARY_POST_DAY`` one. Nothing is returned while no summary
+        table is configured.
+        """
+        if not self.table_monthly_summary:
+            return set()
+        if spec.kind == PROFILE_DAILY.kind:
+            return {_month_start(day) for day in partitions}
+        if spec.kind in (POST_SNAPSHOTS.kind, POST_MILESTONES.kind):
+            return {_month_start(day - timedelta(days=SUMMARY_POST_DAY)) for day in partitions}
+        return set()
+
+    def _monthly_summary_statements(
+        self, months: Iterable[date]
+    ) -> Tuple[List[str], List[QueryParameter]]:
+        """DELETE + INSERT recomputing the summary rows of ``months`` from the base tables.
+
+        Scans are bounded by constant date ranges so only the partitions of
+        the affected months (and their day-``SUMMARY_POST_DAY`` snapshots) are
+        read; post reach comes from the milestone table when one is configured.
+        """
+        months = sorted({_month_start(month) for month in months})
+        summary = self.table_path(self.table_monthly_summary)
+        daily = self.table_path(self.table_profile_daily)
+        if self.table_post_milestones:
+            posts = self.table_path(self.table_post_milestones)
+            post_filter = f"milestone_day = {SUMMARY_POST_DAY}"
+        else:
+            posts = self.table_path(self.table_post_snapshots)
+            post_filter = f"DATE_DIFF(snapshot_date, DATE(post_published_at), DAY) = {SUMMARY_POST_DAY}"
+        parameters = [
+            bigquery.ArrayQueryParameter("summary_months", "DATE", months),
+            bigquery.ScalarQueryParameter("summary_start", "DATE", months[0]),
+            bigquery.ScalarQueryParameter("summary_end", "DATE", _month_end(months[-1])),
+        ]
+        statements = [
+            f"DELETE FROM `{summary}` WHERE month_start IN UNNEST(@summary_months);",
+            f"INSERT INTO `{summary}` (month, month_start, profile_id, profile_username, followers_closing, "
+            "reach_total_all, reach_total_organic, reach_total_paid, profile_views_total, hp_clicks_total, "
+            "post_avg_reach, updated_at) "
+            "WITH post_avg AS ("
+            "SELECT profile_id, DATE_TRUNC(DATE(post_published_at), MONTH) AS month_start, "
+            "AVG(reach_total) AS post_avg_reach "
+            f"FROM `{posts}` "
+            f"WHERE snapshot_date BETWEEN DATE_ADD(@summary_start, INTERVAL {SUMMARY_POST_DAY} DAY) "
+            f"AND DATE_ADD(@summary_end, INTERVAL {SUMMARY_POST_DAY} DAY) "
+            f"AND {post_filter} "
+            "AND DATE_TRUNC(DATE(post_published_at), MONTH) IN UNNEST(@summary_months) "
+            "GROUP BY profile_id, month_start), "
+            "base AS ("
+            "SELECT DATE_TRUNC(date, MONTH) AS month_start, profile_id, profile_username, "
+            "ARRAY_AGG(followers ORDER BY date DESC LIMIT 1)[OFFSET(0)] AS followers_closing, "
+            "SUM(reach_total) AS reach_total_all, SUM(reach_organic) AS reach_total_organic, "
+            "SUM(reach_paid) AS reach_total_paid, SUM(profile_views) AS profile_views_total, "
+            "SUM(bio_link_clicks) AS hp_clicks_total "
+            f"FROM `{daily}` "
+            "WHERE date BETWEEN @summary_start AND @summary_end "
+            "AND DATE_TRUNC(date, MONTH) IN UNNEST(@summary_months) "
+            "GROUP BY month_start, profile_id, profile_username) "
+            "SELECT FORMAT_DATE('%Y-%m', base.month_start), base.month_start, base.profile_id, "
+            "base.profile_username, base.followers_closing, base.reach_total_all, base.reach_total_organic, "
+            "base.reach_total_paid, base.profile_views_total, base.hp_clicks_total, post_avg.post_avg_reach, "
+            "CURRENT_TIMESTAMP() "
+            "FROM base LEFT JOIN post_avg "
+            "ON post_avg.profile_id = base.profile_id AND post_avg.month_start = base.month_start;",
+        ]
+        return statements, parameters
+
+    def refresh_monthly_summary(self, months: Iterable[date]) -> List[date]:
+        """Recompute the summary rows of ``months`` (any day within each month) in one transaction.
+
+        Writes through :meth:`write_batch` already do this for the months they
+        touch; call it directly to populate history or repair a month.
+        Returns the refreshed month starts.
+        """
+        months = sorted({_month_start(month) for month in months})
+        if not months or not self.table_monthly_summary:
+            return []
+        statements, parameters = self._monthly_summary_statements(months)
+        job_config = bigquery.QueryJobConfig(query_parameters=parameters)
+        with timed("bq_merge"):
+            query_job = self.client.query(_transaction_script(statements), job_config=job_config)
+            query_job.result()
+        observe_query_job(query_job)
+        logger.info("Refreshed %s months of %s", len(months), self.table_monthly_summary)
+        return months
+
+    def _upsert(self, spec: TableSpec, rows: Iterable[dict]) -> int:
+        with self.write_batch() as batch:
+            return batch.stage(spec, rows)
+
+    def upsert_profile_daily(self, rows: Iterable[dict]) -> int:
+        return self._upsert(PROFILE_DAILY, rows)
+
+    def upsert_post_snapshots(self, rows: Iterable[dict]) -> int:
+        return self._upsert(POST_SNAPSHOTS, rows)
+
+    def upsert_post_milestones(self, rows: Iterable[dict]) -> int:
+        return self._upsert(POST_MILESTONES, rows)
+
+    def upsert_demographics(self, rows: Iterable[dict]) -> int:
+        return self._upsert(DEMOGRAPHICS, rows)
+
+    def recent_posts(self, lookback_days: int, as_of: Optional[date] = None) -> List[dict]:
+        """Posts snapshotted in the ``lookback_days`` up to ``as_of`` (default: today), one row per post."""
         query = f"""
-        SELECT post_id, profile_id, MAX(post_published_at) AS post_published_at
+        SELECT post_id, profile_id, ANY_VALUE(space_id) AS space_id,
+               MAX(post_published_at) AS post_published_at
         FROM `{self.table_path(self.table_post_snapshots)}`
-        WHERE snapshot_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @lookback DAY)
+        WHERE snapshot_date BETWEEN DATE_SUB(COALESCE(@as_of, CURRENT_DATE()), INTERVAL @lookback DAY)
+          AND COALESCE(@as_of, CURRENT_DATE())
         GROUP BY post_id, profile_id
         """
         job_config = bigquery.QueryJobConfig(
-            query_parameters=[bigquery.ScalarQueryParameter("lookback", "INT64", lookback_days)]
+            query_parameters=[
+                bigquery.ScalarQueryParameter("lookback", "INT64", lookback_days),
+                bigquery.ScalarQueryParameter("as_of", "DATE", as_of),
+            ]
         )
         result = self.client.query(query, job_config=job_config).result()
         return [dict(row) for row in result]
+
+    def latest_post_fingerprints(self, since: date, before: date) -> Dict[str, Tuple[date, str]]:
+        """Date and ``metrics_fingerprint`` of each post's latest snapshot in ``since``..``before`` (exclusive)."""
+        query = f"""
+        SELECT
+          post_id,
+          ARRAY_AGG(STRUCT(snapshot_date, metrics_fingerprint) ORDER BY snapshot_date DESC LIMIT 1)[OFFSET(0)] AS latest
+        FROM `{self.table_path(self.table_post_snapshots)}`
+        WHERE snapshot_date >= @since AND snapshot_date < @before AND metrics_fingerprint IS NOT NULL
+        GROUP BY post_id
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("since", "DATE", since),
+                bigquery.ScalarQueryParameter("before", "DATE", before),
+            ]
+        )
+        result = self.client.query(query, job_config=job_config).result()
+        return {
+            row["post_id"]: (row["latest"]["snapshot_date"], row["latest"]["metrics_fingerprint"]) for row in result
+        }
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo
+
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".json.gz"
+
+
+class ResponseCache:
+    """Gzip-compressed insights responses on disk, keyed by space id and request body.
+
+    Only closed date ranges of time-series requests (a ``date`` dimension
+    whose ``time_range.until`` is before today in ``tz``) are cacheable: post
+    and demographics metrics describe the current state whatever the range,
+    and today's numbers are still moving. Entries are evicted least recently
+    used first once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, tz: ZoneInfo = ZoneInfo("UTC")):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.tz = tz
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(space_id: str, body: Dict[str, Any]) -> str:
+        payload = json.dumps({"space_id": space_id, "body": body}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cacheable(self, body: Dict[str, Any]) -> bool:
+        if "date" not in body.get("dimensions", ()):
+            return False
+        try:
+            until = date.fromisoformat(str(body["time_range"]["until"]))
+        except (KeyError, TypeError, ValueError):
+            return False
+        return until < datetime.now(self.tz).date()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                data = json.load(handle)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable cache entry %s", path)
+            return None
+        return data
+
+    def put(self, key: str, data: Any) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        payload = gzip.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        with self._lock:
+            total = self._size()
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+            self._total_bytes = total + len(payload) - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(_SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def _size(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+        return self._total_bytes
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is back under 90% of ``max_bytes``."""
+        target = int(self.max_bytes * 0.9)
+        for path, _, size in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._total_bytes -= size
+        logger.debug("Response cache evicted down to %s bytes", self._total_bytes)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Set, Tuple
+
+
+# (space_id, profile_id) of a profile whose rows a job run has written.
+ProfileKey = Tuple[str, str]
+
+
+class CheckpointStore:
+    """Per-profile completion markers of job runs, kept in process memory.
+
+    A run marks profiles as done once their rows are written, so a retry of
+    the same job and date skips them; the markers are cleared when the run
+    completes. Subclasses persist the markers elsewhere.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done: Dict[Tuple[str, date], Set[ProfileKey]] = {}
+
+    def completed(self, job: str, day: date) -> Set[ProfileKey]:
+        with self._lock:
+            return set(self._done.get((job, day), ()))
+
+    def mark_done(self, job: str, day: date, profiles: Iterable[ProfileKey]) -> None:
+        with self._lock:
+            self._done.setdefault((job, day), set()).update(profiles)
+
+    def clear(self, job: str, day: date) -> None:
+        with self._lock:
+            self._done.pop((job, day), None)
+
+
+class SqliteCheckpointStore(CheckpointStore):
+    """Checkpoint markers in a local SQLite file, surviving process restarts."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "job TEXT NOT NULL, day TEXT NOT NULL, space_id TEXT NOT NULL, profile_id TEXT NOT NULL, "
+                "completed_at TEXT NOT NULL, PRIMARY KEY (job, day, space_id, profile_id))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def completed(self, job: str, day: date) -> Set[ProfileKey]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT space_id, profile_id FROM checkpoints WHERE job = ? AND day = ?", (job, str(day))
+            ).fetchall()
+        return {(space_id, profile_id) for space_id, profile_id in rows}
+
+    def mark_done(self, job: str, day: date, profiles: Iterable[ProfileKey]) -> None:
+        completed_at = datetime.now(timezone.utc).isoformat()
+        rows = [(job, str(day), space_id, profile_id, completed_at) for space_id, profile_id in profiles]
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)", rows)
+
+    def clear(self, job: str, day: date) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM checkpoints WHERE job = ? AND day = ?", (job, str(day)))
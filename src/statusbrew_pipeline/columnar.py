@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import io
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+
+_ARROW_TYPES = {
+    "STRING": pa.string(),
+    "INT64": pa.int64(),
+    "INTEGER": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "FLOAT": pa.float64(),
+    "BOOL": pa.bool_(),
+    "BOOLEAN": pa.bool_(),
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+}
+
+# Audit columns stamped once per batch rather than per row.
+STAMP_COLUMNS = ("created_at", "updated_at")
+
+
+def arrow_schema(schema: Sequence[bigquery.SchemaField]) -> pa.Schema:
+    """Map a ``table_schemas`` definition onto the equivalent Arrow schema."""
+    return pa.schema([pa.field(field.name, _ARROW_TYPES[field.field_type]) for field in schema])
+
+
+def table_to_parquet(table: pa.Table) -> bytes:
+    """Encode an Arrow table as a Snappy-compressed Parquet file."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    return buffer.getvalue()
+
+
+class ColumnarBatch:
+    """Column-buffered rows for one table, typed by its ``table_schemas`` schema.
+
+    Rows are plain mappings keyed by column name; missing keys become nulls.
+    Conversion happens a whole column at a time in :meth:`to_arrow`, and the
+    ``created_at`` / ``updated_at`` columns get a single timestamp per batch.
+    """
+
+    __slots__ = ("schema", "arrow_schema", "_names", "_buffers")
+
+    def __init__(self, schema: Sequence[bigquery.SchemaField]):
+        self.schema = list(schema)
+        self.arrow_schema = arrow_schema(self.schema)
+        self._names = [field.name for field in self.schema]
+        self._buffers: List[list] = [[] for _ in self._names]
+
+    def __len__(self) -> int:
+        return len(self._buffers[0]) if self._buffers else 0
+
+    def append(self, row: Mapping) -> None:
+        get = row.get
+        for name, buffer in zip(self._names, self._buffers):
+            buffer.append(get(name))
+
+    def clear(self) -> None:
+        self._buffers = [[] for _ in self._names]
+
+    def to_columns(self, created_at: Optional[datetime] = None) -> Dict[str, list]:
+        stamp = created_at or datetime.now(timezone.utc)
+        columns = {}
+        for name, buffer in zip(self._names, self._buffers):
+            if name in STAMP_COLUMNS:
+                buffer = [stamp if value is None else value for value in buffer]
+            columns[name] = buffer
+        return columns
+
+    def to_arrow(self, created_at: Optional[datetime] = None) -> pa.Table:
+        stamp = created_at or datetime.now(timezone.utc)
+        arrays = []
+        for field, buffer in zip(self.arrow_schema, self._buffers):
+            array = pa.array(buffer, type=field.type)
+            if field.name in STAMP_COLUMNS and array.null_count:
+                array = pc.fill_null(array, pa.scalar(stamp, type=field.type))
+            arrays.append(array)
+        return pa.Table.from_arrays(arrays, schema=self.arrow_schema)
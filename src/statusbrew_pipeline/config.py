@@ -10,6 +10,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# List settings given as comma-separated strings rather than JSON.
+_COMMA_SEPARATED_FIELDS = {"space_ids", "bq_partition_replace_tables", "post_milestones"}
+
 
 class Settings(BaseSettings):
     """Runtime configuration loaded from environment variables."""
@@ -19,6 +22,9 @@ class Settings(BaseSettings):
     table_profile_daily: str = Field("sb_ig_profile_daily_metrics", env="TABLE_PROFILE_DAILY")
     table_post_snapshots: str = Field("sb_ig_post_daily_snapshots", env="TABLE_POST_SNAPSHOTS")
     table_demographics: str = Field("sb_ig_follower_demographics", env="TABLE_DEMOGRAPHICS")
+    table_post_milestones: Optional[str] = Field(None, env="TABLE_POST_MILESTONES")
+    table_monthly_summary: Optional[str] = Field(None, env="TABLE_MONTHLY_SUMMARY")
+    table_demographics_history: Optional[str] = Field(None, env="TABLE_DEMOGRAPHICS_HISTORY")
 
     statusbrew_base_url: str = Field("https://api.statusbrew.com", env="STATUSBREW_BASE_URL")
     statusbrew_access_token: Optional[str] = Field(None, env="STATUSBREW_ACCESS_TOKEN")
@@ -28,11 +34,40 @@ class Settings(BaseSettings):
     space_ids: List[str] = Field(..., env="SPACE_IDS")
     timezone: str = Field("Asia/Tokyo", env="TIMEZONE")
     recent_post_lookback_days: int = Field(10, env="RECENT_POST_LOOKBACK_DAYS")
+    post_incremental_targeting: bool = Field(False, env="POST_INCREMENTAL_TARGETING")
+    post_tracking_days: int = Field(30, env="POST_TRACKING_DAYS")
+    post_discovery_days: int = Field(3, env="POST_DISCOVERY_DAYS")
+    post_milestones: List[int] = Field([1, 3, 7], env="POST_MILESTONES")
+    post_snapshot_skip_unchanged: bool = Field(False, env="POST_SNAPSHOT_SKIP_UNCHANGED")
+    fingerprint_index_path: Optional[str] = Field(None, env="FINGERPRINT_INDEX_PATH")
+    checkpoint_path: Optional[str] = Field(None, env="CHECKPOINT_PATH")
+    checkpoint_flush_profiles: int = Field(200, env="CHECKPOINT_FLUSH_PROFILES")
+    backfill_window_days: int = Field(28, env="BACKFILL_WINDOW_DAYS")
     http_timeout_seconds: int = Field(60, env="HTTP_TIMEOUT_SECONDS")
     http_retries: int = Field(3, env="HTTP_RETRIES")
+    statusbrew_max_concurrency: int = Field(8, env="STATUSBREW_MAX_CONCURRENCY")
+    statusbrew_max_concurrency_per_space: int = Field(4, env="STATUSBREW_MAX_CONCURRENCY_PER_SPACE")
+    statusbrew_rate_limit_per_second: float = Field(0.0, env="STATUSBREW_RATE_LIMIT_PER_SECOND")
+    statusbrew_rate_limit_burst: int = Field(10, env="STATUSBREW_RATE_LIMIT_BURST")
+    insights_profile_batch_size: int = Field(1, env="INSIGHTS_PROFILE_BATCH_SIZE")
+    job_workers: int = Field(2, env="JOB_WORKERS")
+    job_history_limit: int = Field(200, env="JOB_HISTORY_LIMIT")
+    warm_up_on_startup: bool = Field(False, env="WARM_UP_ON_STARTUP")
+    shard_base_url: Optional[str] = Field(None, env="SHARD_BASE_URL")
+    shard_count: int = Field(4, env="SHARD_COUNT")
+    shard_timeout_seconds: int = Field(3600, env="SHARD_TIMEOUT_SECONDS")
+    response_cache_dir: Optional[str] = Field(None, env="RESPONSE_CACHE_DIR")
+    response_cache_max_mb: int = Field(512, env="RESPONSE_CACHE_MAX_MB")
+    profile_cache_ttl_seconds: int = Field(900, env="PROFILE_CACHE_TTL_SECONDS")
+
+    bq_load_chunk_rows: int = Field(50_000, env="BQ_LOAD_CHUNK_ROWS")
+    bq_partition_replace_tables: List[str] = Field([], env="BQ_PARTITION_REPLACE_TABLES")
+    bq_staging_expiration_hours: int = Field(6, env="BQ_STAGING_EXPIRATION_HOURS")
 
     slack_webhook_url: Optional[str] = Field(None, env="SLACK_WEBHOOK_URL")
     slack_channel: Optional[str] = Field(None, env="SLACK_CHANNEL")
+    slack_coalesce_seconds: float = Field(2.0, env="SLACK_COALESCE_SECONDS")
+    slack_queue_size: int = Field(1000, env="SLACK_QUEUE_SIZE")
 
     app_port: int = Field(8080, env="PORT")
 
@@ -40,12 +75,34 @@ class Settings(BaseSettings):
         env_file = ".env"
         env_file_encoding = "utf-8"
 
-    @validator("space_ids", pre=True)
+        @classmethod
+        def parse_env_var(cls, field_name: str, raw_val: str):
+            if field_name in _COMMA_SEPARATED_FIELDS:
+                return raw_val
+            return cls.json_loads(raw_val)
+
+    @validator(*_COMMA_SEPARATED_FIELDS, pre=True)
     def parse_space_ids(cls, value: str | list[str]) -> list[str]:
         if isinstance(value, list):
             return value
         return [v.strip() for v in value.split(",") if v.strip()]
 
+    @validator("post_milestones")
+    def check_milestones(cls, value: list[int], values: dict) -> list[int]:
+        if not values.get("table_post_milestones"):
+            return value
+        # sql/post_milestones.sql points vw_ig_post_day7_metrics at milestone_day = 7.
+        if 7 not in value:
+            raise ValueError("POST_MILESTONES must include 7 when TABLE_POST_MILESTONES is set")
+        # Posts older than the fetch window never reach a later milestone.
+        if values.get("post_incremental_targeting"):
+            window, window_name = values.get("post_tracking_days"), "POST_TRACKING_DAYS"
+        else:
+            window, window_name = values.get("recent_post_lookback_days"), "RECENT_POST_LOOKBACK_DAYS"
+        if window is not None and value and max(value) > window:
+            raise ValueError(f"POST_MILESTONES may not exceed {window_name} ({window}); got {max(value)}")
+        return value
+
     @property
     def tz(self) -> ZoneInfo:
         return ZoneInfo(self.timezone)
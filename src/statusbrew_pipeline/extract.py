@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from dateutil import parser
+
+
+# Where a field may live in an insights record, in lookup order; None is the top level.
+CONTAINERS: Tuple[Optional[str], ...] = (None, "metrics", "dimensions", "post", "profile")
+
+# Shapes seen per extractor before the plan cache is reset.
+_MAX_PLANS = 64
+
+
+def parse_datetime(value: Optional[str | datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return parser.parse(value)
+    except Exception:
+        return None
+
+
+def parse_date(value: Optional[str | date]) -> Optional[date]:
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    parsed = parse_datetime(value)
+    return parsed.date() if parsed else None
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def safe_str(value) -> str:
+    if value is None:
+        return ""
+    return str(value)
+
+
+def to_profile_id(value) -> Optional[str]:
+    """Profile id given either as a plain value or as a nested profile object."""
+    if isinstance(value, dict):
+        value = value.get("id") or value.get("profile_id") or value.get("uid")
+    return str(value) if value else None
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Output column ``name`` read from the first non-null of ``sources``."""
+
+    name: str
+    sources: Tuple[str, ...]
+    convert: Callable[[Any], Any] = to_int
+
+
+def _shape(record: dict) -> tuple:
+    shape = [tuple(record)]
+    for container in CONTAINERS[1:]:
+        nested = record.get(container)
+        shape.append(tuple(nested) if isinstance(nested, dict) else None)
+    return tuple(shape)
+
+
+class RecordExtractor:
+    """Declarative field mapping compiled into per-shape lookup plans.
+
+    The first record of each response shape (its key layout at the top level
+    and in the ``metrics`` / ``dimensions`` / ``post`` / ``profile`` dicts)
+    resolves where every source key lives; later records of the same shape
+    index straight into those locations.
+    """
+
+    def __init__(self, fields: Sequence[FieldSpec]):
+        self.fields = tuple(fields)
+        self._plans: Dict[tuple, tuple] = {}
+
+    def _compile(self, record: dict) -> tuple:
+        plan = []
+        for field in self.fields:
+            locations = []
+            for key in field.sources:
+                for container in CONTAINERS:
+                    scope = record if container is None else record.get(container)
+                    if isinstance(scope, dict) and key in scope:
+                        locations.append((container, key))
+                        break
+            plan.append((field.name, field.convert, tuple(locations)))
+        return tuple(plan)
+
+    def __call__(self, record: dict) -> dict:
+        shape = _shape(record)
+        plan = self._plans.get(shape)
+        if plan is None:
+            if len(self._plans) >= _MAX_PLANS:
+                self._plans.clear()
+            plan = self._plans[shape] = self._compile(record)
+        values = {}
+        for name, convert, locations in plan:
+            value = None
+            for container, key in locations:
+                value = record[key] if container is None else record[container][key]
+                if value is not None:
+                    break
+            values[name] = convert(value)
+        return values
+
+
+PROFILE_DAILY_FIELDS = (
+    FieldSpec("date", ("date",), parse_date),
+    FieldSpec("profile_username", ("profile_username",), safe_str),
+    FieldSpec("followers", ("followers",)),
+    FieldSpec("followers_gained", ("followers_gained",)),
+    FieldSpec("unfollowers", ("unfollowers",)),
+    FieldSpec("actual_growth", ("actual_growth",)),
+    FieldSpec("reach_total", ("reach", "reach_total")),
+    FieldSpec("reach_organic", ("reach_from_organic",)),
+    FieldSpec("reach_paid", ("reach_from_paid",)),
+    FieldSpec("impressions", ("impressions",)),
+    FieldSpec("profile_views", ("profile_views",)),
+    FieldSpec("bio_link_clicks", ("bio_link_clicks",)),
+)
+
+POST_SNAPSHOT_FIELDS = (
+    FieldSpec("post_id", ("post_id", "post"), safe_str),
+    FieldSpec("post_permalink", ("post_permalink", "permalink"), safe_str),
+    FieldSpec("post_type", ("post_type", "type"), safe_str),
+    FieldSpec("post_published_at", ("post_published_at", "post_created_at"), parse_datetime),
+    FieldSpec("reach_total", ("post_reach",)),
+    FieldSpec("impressions_total", ("post_impressions",)),
+    FieldSpec("likes", ("post_reactions", "post_likes")),
+    FieldSpec("comments", ("post_comments",)),
+    FieldSpec("shares", ("post_shares",)),
+    FieldSpec("saves", ("post_saved", "post_saves")),
+    FieldSpec("follows", ("post_follows",)),
+    FieldSpec("profile_activity_total", ("post_profile_activity_total",)),
+    FieldSpec("bio_link_clicks", ("post_profile_activity_bio_link_clicked",)),
+)
+
+# Profile an insights record belongs to, used to split batched responses and label post rows.
+PROFILE_ID_FIELDS = (FieldSpec("profile_id", ("profile_id", "profile"), to_profile_id),)
+
+DEMOGRAPHICS_FIELDS = (
+    FieldSpec("age_group", ("age",), safe_str),
+    FieldSpec("gender", ("gender",), safe_str),
+    FieldSpec("country", ("country",), safe_str),
+    FieldSpec("city", ("city",), safe_str),
+    FieldSpec("followers", ("followers",)),
+)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .job_queue import add_progress
+from .metrics import record_stage
+from .statusbrew_client import AsyncStatusbrewClient, StatusbrewClient
+
+
+T = TypeVar("T")
+
+FetchCall = Callable[[AsyncStatusbrewClient], Awaitable[List[dict]]]
+# Paginated request streaming its records, such as ``AsyncStatusbrewClient.aiter_post_snapshots``.
+RecordSource = Callable[[AsyncStatusbrewClient], AsyncIterator[dict]]
+# A started request and the iterator of its outputs; consuming the iterator waits for the request.
+_Started = Tuple["Future[Any]", Iterator[Any]]
+
+# Records handed from a paginated source to the consumer at a time, and chunks buffered per source.
+_CHUNK_RECORDS = 500
+_QUEUED_CHUNKS = 2
+
+_END = object()
+
+
+class FetchStream:
+    """Async Statusbrew requests consumed from synchronous code as they complete.
+
+    One async client runs on a private event loop in a background thread for
+    the lifetime of the ``with`` block. :meth:`results` and :meth:`records`
+    each keep at most ``window`` requests ahead of the consumer and yield
+    their records in request order, so a job can stage each response and let
+    it go before the rest arrive. Time the consumer spends waiting is
+    recorded as the ``fetch`` stage.
+    """
+
+    def __init__(self, statusbrew: StatusbrewClient, window: Optional[int] = None):
+        self.statusbrew = statusbrew
+        # Twice the client's concurrency keeps it busy while the consumer transforms and loads.
+        self.window = max(1, window or 2 * max(1, statusbrew.max_concurrency))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncStatusbrewClient] = None
+
+    def __enter__(self) -> "FetchStream":
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="statusbrew-fetch", daemon=True)
+        self._thread.start()
+        try:
+            self._client = self._submit(self._open()).result()
+        except BaseException:
+            self._stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self._submit(self._close()).result()
+        finally:
+            self._stop()
+
+    async def _open(self) -> AsyncStatusbrewClient:
+        # The async client binds to the running loop, so it is built on the fetch thread.
+        return self.statusbrew.async_client()
+
+    async def _close(self) -> None:
+        current = asyncio.current_task()
+        outstanding = [task for task in asyncio.all_tasks() if task is not current]
+        for task in outstanding:
+            task.cancel()
+        await asyncio.gather(*outstanding, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+
+    def _stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def _submit(self, coroutine: Awaitable[T]) -> "Future[T]":
+        # The task runs in a copy of the caller's context, so request metrics reach the job's timings.
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def results(self, calls: Sequence[FetchCall]) -> Iterator[List[dict]]:
+        """Records of each call in ``calls``, in order, with at most ``window`` requests in flight."""
+
+        def _start(call: FetchCall) -> _Started:
+            future = self._submit(call(self._client))
+
+            def _outputs() -> Iterator[List[dict]]:
+                yield future.result()
+
+            return future, _outputs()
+
+        return self._ordered(calls, _start)
+
+    def records(self, sources: Sequence[RecordSource]) -> Iterator[Tuple[int, List[dict]]]:
+        """``(index, records)`` chunks of each paginated source in ``sources``, in order.
+
+        Up to ``window`` sources page through the API at once. Each buffers at
+        most ``_QUEUED_CHUNKS`` chunks of ``_CHUNK_RECORDS`` records until the
+        consumer reaches it, so a long source does not hold its whole result.
+        """
+
+        def _start(item: Tuple[int, RecordSource]) -> _Started:
+            index, source = item
+            queue: "asyncio.Queue[object]" = asyncio.Queue(maxsize=_QUEUED_CHUNKS)
+            future = self._submit(self._pump(source, queue))
+
+            def _outputs() -> Iterator[Tuple[int, List[dict]]]:
+                while True:
+                    chunk = self._submit(queue.get()).result()
+                    if chunk is _END:
+                        return
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    yield index, chunk
+
+            return future, _outputs()
+
+        return self._ordered(list(enumerate(sources)), _start)
+
+    async def _pump(self, source: RecordSource, queue: "asyncio.Queue[object]") -> None:
+        chunk: List[dict] = []
+        try:
+            async for record in source(self._client):
+                chunk.append(record)
+                if len(chunk) >= _CHUNK_RECORDS:
+                    await queue.put(chunk)
+                    chunk = []
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await queue.put(exc)
+            return
+        if chunk:
+            await queue.put(chunk)
+        await queue.put(_END)
+
+    def _ordered(self, items: Sequence[T], start: Callable[[T], _Started]) -> Iterator:
+        """Start the first ``window`` of ``items`` now and yield their outputs in order as they finish.
+
+        Starting before the iterator is consumed lets several streams opened
+        one after another fetch together while they are consumed in turn.
+        """
+        if self._client is None:
+            raise RuntimeError("FetchStream is not open")
+        add_progress("requests_planned", len(items))
+        remaining = iter(items)
+        pending: Deque[_Started] = deque()
+
+        def _fill() -> None:
+            for item in itertools.islice(remaining, self.window - len(pending)):
+                pending.append(start(item))
+
+        _fill()
+
+        def _consume() -> Iterator:
+            waited = 0.0
+            try:
+                while pending:
+                    outputs = pending[0][1]
+                    while True:
+                        began = time.perf_counter()
+                        try:
+                            output = next(outputs, _END)
+                        finally:
+                            waited += time.perf_counter() - began
+                        if output is _END:
+                            break
+                        yield output
+                    pending.popleft()
+                    add_progress("requests_done")
+                    _fill()
+            finally:
+                for future, _ in pending:
+                    future.cancel()
+                record_stage("fetch", waited)
+
+        return _consume()
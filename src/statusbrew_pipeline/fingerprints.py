@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Post snapshot columns whose values decide whether a post changed since its last snapshot.
+POST_METRIC_COLUMNS = (
+    "reach_total",
+    "impressions_total",
+    "likes",
+    "comments",
+    "shares",
+    "saves",
+    "follows",
+    "profile_activity_total",
+    "bio_link_clicks",
+)
+
+
+def metrics_fingerprint(row: Mapping, columns: Iterable[str] = POST_METRIC_COLUMNS) -> str:
+    """Compact 64-bit hex digest of ``row``'s metric values."""
+    payload = "|".join("" if row.get(column) is None else str(row.get(column)) for column in columns)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class FingerprintIndex:
+    """Snapshot date and metrics fingerprint last written per post id, persisted as a JSON file.
+
+    A row is only compared against a fingerprint from an earlier snapshot
+    date, so re-running or backfilling a date at or before the one recorded
+    still writes its rows. Without a ``path`` the index lives in memory only
+    and is seeded by the caller (for example from the ``metrics_fingerprint``
+    column in BigQuery).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fingerprints: Optional[Dict[str, List[str]]] = None
+
+    def _load(self) -> Dict[str, List[str]]:
+        if self._fingerprints is None:
+            self._fingerprints = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as handle:
+                        loaded = json.load(handle)
+                except (OSError, ValueError):
+                    logger.warning("Ignoring unreadable fingerprint index %s", self.path)
+                else:
+                    # Entries without a snapshot date (older index files) cannot be compared safely.
+                    self._fingerprints = {
+                        post_id: entry for post_id, entry in loaded.items() if isinstance(entry, list)
+                    }
+        return self._fingerprints
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def get(self, post_id: str) -> Optional[Tuple[date, str]]:
+        """``(snapshot_date, fingerprint)`` last recorded for ``post_id``."""
+        with self._lock:
+            entry = self._load().get(post_id)
+        return (date.fromisoformat(entry[0]), entry[1]) if entry else None
+
+    def seed(self, fingerprints: Mapping[str, Tuple[date, str]]) -> None:
+        """Add ``(snapshot_date, fingerprint)`` pairs for posts the index does not know yet."""
+        with self._lock:
+            known = self._load()
+            for post_id, (snapshot, fingerprint) in fingerprints.items():
+                known.setdefault(post_id, [snapshot.isoformat(), fingerprint])
+
+    def update(self, fingerprints: Mapping[str, str], snapshot: date) -> None:
+        """Record fingerprints written for ``snapshot`` and persist the index atomically.
+
+        Posts already recorded for a later date keep that entry.
+        """
+        day = snapshot.isoformat()
+        with self._lock:
+            known = self._load()
+            for post_id, fingerprint in fingerprints.items():
+                entry = known.get(post_id)
+                if entry is None or entry[0] <= day:
+                    known[post_id] = [day, fingerprint]
+            if not self.path:
+                return
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(known, handle, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+
+    def changed_only(
+        self,
+        rows: Iterable[dict],
+        snapshot: date,
+        seen: Dict[str, str],
+        skipped: List[str],
+        keep: Optional[Callable[[dict], bool]] = None,
+    ) -> Iterator[dict]:
+        """Yield rows of ``snapshot`` unless an earlier snapshot had the same fingerprint.
+
+        Rows for which ``keep`` returns true are always yielded. Every row's
+        fingerprint is collected in ``seen`` so the caller can :meth:`update`
+        the index once the write succeeded; ``skipped`` gets one entry per
+        dropped row.
+        """
+        for row in rows:
+            post_id = row["post_id"]
+            fingerprint = row["metrics_fingerprint"]
+            seen[post_id] = fingerprint
+            previous = self.get(post_id)
+            if (
+                previous is not None
+                and previous[0] < snapshot
+                and previous[1] == fingerprint
+                and not (keep and keep(row))
+            ):
+                skipped.append(post_id)
+                continue
+            yield row
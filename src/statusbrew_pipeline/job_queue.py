@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+_current_job: ContextVar[Optional["JobRecord"]] = ContextVar("current_job", default=None)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class JobRecord:
+    """State of one submitted job, safe to read while its worker updates it."""
+
+    job_id: str
+    kind: str
+    key: Hashable
+    status: str = STATUS_QUEUED
+    submitted_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    progress: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (STATUS_SUCCEEDED, STATUS_FAILED)
+
+    def add_progress(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.progress[counter] = self.progress.get(counter, 0) + amount
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "status": self.status,
+                "submitted_at": self.submitted_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+def add_progress(counter: str, amount: int = 1) -> None:
+    """Increment a counter on the job running in the current context; a no-op outside a job."""
+    job = _current_job.get()
+    if job is not None:
+        job.add_progress(counter, amount)
+
+
+class JobQueue:
+    """Bounded background executor for pipeline jobs.
+
+    ``submit`` returns immediately with a :class:`JobRecord`; at most
+    ``max_workers`` jobs run at once and the rest wait in order. While a job
+    with the same ``key`` is queued or running, submitting it again returns
+    the existing record instead of starting a second execution. Finished
+    records are kept for status polling, up to ``max_history`` of them.
+    """
+
+    def __init__(self, max_workers: int = 2, max_history: int = 200):
+        self.max_history = max(1, max_history)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, JobRecord]" = OrderedDict()
+        self._inflight: Dict[Hashable, JobRecord] = {}
+
+    def submit(self, kind: str, key: Hashable, fn: Callable[[], dict]) -> Tuple[JobRecord, bool]:
+        """Queue ``fn``; returns the job record and whether a new execution was started."""
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                logger.info("Job %s already in flight as %s", key, existing.job_id)
+                return existing, False
+            job = JobRecord(job_id=uuid.uuid4().hex, kind=kind, key=key)
+            self._inflight[key] = job
+            self._jobs[job.job_id] = job
+            self._trim()
+        self._executor.submit(self._run, job, fn)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _trim(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_history:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+
+    def _run(self, job: JobRecord, fn: Callable[[], dict]) -> None:
+        context = copy_context()
+        context.run(_current_job.set, job)
+        with job._lock:
+            job.status = STATUS_RUNNING
+            job.started_at = _now()
+        status, result, error = STATUS_FAILED, None, None
+        try:
+            result = context.run(fn)
+            status = STATUS_SUCCEEDED
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job.job_id, job.kind)
+            error = str(exc)
+        finally:
+            # One step, so a finished job is never seen in flight or without its outcome.
+            with self._lock, job._lock:
+                job.status = status
+                job.result = result
+                job.error = error
+                job.finished_at = _now()
+                self._inflight.pop(job.key, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; queued jobs that have not started are cancelled."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,57 +1,65 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import logging
-from datetime import date, datetime, timedelta
-from typing import List, Optional
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import AbstractSet, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from dateutil import parser
-
-from .models import ProfileDailyMetric, PostDailySnapshot, FollowerDemographics
+from .checkpoints import CheckpointStore, SqliteCheckpointStore
+from .extract import (
+    DEMOGRAPHICS_FIELDS,
+    POST_SNAPSHOT_FIELDS,
+    PROFILE_DAILY_FIELDS,
+    PROFILE_ID_FIELDS,
+    RecordExtractor,
+    safe_str,
+)
+from .fetch_stream import FetchCall, FetchStream
+from .fingerprints import FingerprintIndex, metrics_fingerprint
+from .job_queue import add_progress
+from .metrics import job_timer, record_stage, timed, timed_job, timed_rows
 from .slack import SlackNotifier
-from .statusbrew_client import StatusbrewClient
-from .bq import BigQueryService
+from .profiles import ProfileRecord, ProfileRegistry
+from .statusbrew_client import AsyncStatusbrewClient, StatusbrewClient
+from .bq import (
+    DEMOGRAPHICS,
+    POST_MILESTONES,
+    POST_SNAPSHOTS,
+    PROFILE_DAILY,
+    SUMMARY_POST_DAY,
+    BigQueryService,
+    StagedTable,
+    TableSpec,
+    WriteBatch,
+)
 from .config import Settings
+from .sharding import SHARDED_JOBS, Shard, ShardCoordinator
 
 
 logger = logging.getLogger(__name__)
 
+# Jobs whose history the insights API can return for past date ranges.
+BACKFILL_JOBS = ("profile_daily",)
 
-def _parse_datetime(value: Optional[str | datetime]) -> Optional[datetime]:
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value
-    try:
-        return parser.parse(value)
-    except Exception:
-        return None
-
-
-def _to_int(value):
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
-
+# Post ids sent per insights request when targeting known posts.
+POST_IDS_PER_REQUEST = 100
 
-def _safe_str(value) -> str:
-    if value is None:
-        return ""
-    return str(value)
+ProfileFetch = Callable[[AsyncStatusbrewClient, str, List[str]], Awaitable[List[dict]]]
+# (space_id, profile_ids, since, until, post_ids) for one post snapshot request.
+PostRequest = Tuple[str, List[str], date, date, Optional[List[str]]]
+# Instagram profiles by space id and profile id, resolved once per job run.
+ProfileMaps = Dict[str, Dict[str, ProfileRecord]]
 
 
-def _get(record: dict, key: str):
-    if key in record:
-        return record[key]
-    if "metrics" in record and key in record["metrics"]:
-        return record["metrics"][key]
-    if "dimensions" in record and key in record["dimensions"]:
-        return record["dimensions"][key]
-    if "post" in record and isinstance(record["post"], dict) and key in record["post"]:
-        return record["post"][key]
-    if "profile" in record and isinstance(record["profile"], dict) and key in record["profile"]:
-        return record["profile"][key]
-    return None
+def _days_since_post(snapshot: date, published: Optional[datetime]) -> Optional[int]:
+    """Age of a post on ``snapshot`` in days, counted from its UTC publish date."""
+    if published is None:
+        return None
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc)
+    return (snapshot - published.date()).days
 
 
 class JobRunner:
@@ -61,126 +69,728 @@ class JobRunner:
         statusbrew: StatusbrewClient,
         bq: BigQueryService,
         notifier: SlackNotifier,
+        profiles: Optional[ProfileRegistry] = None,
+        fingerprints: Optional[FingerprintIndex] = None,
+        checkpoints: Optional[CheckpointStore] = None,
     ):
         self.settings = settings
         self.statusbrew = statusbrew
         self.bq = bq
         self.notifier = notifier
+        self.profiles = profiles or ProfileRegistry(statusbrew, ttl_seconds=settings.profile_cache_ttl_seconds)
+        self.fingerprints = fingerprints or FingerprintIndex(settings.fingerprint_index_path)
+        if checkpoints is None and settings.checkpoint_path:
+            checkpoints = SqliteCheckpointStore(settings.checkpoint_path)
+        self.checkpoints = checkpoints
 
     def _yesterday(self) -> date:
         now = datetime.now(self.settings.tz)
         return (now - timedelta(days=1)).date()
 
-    def run_profile_daily(self, target_date: Optional[date] = None) -> dict:
-        target = target_date or self._yesterday()
-        rows: List[dict] = []
+    def default_date(self, job: str) -> date:
+        """Date a job runs for when none is given: yesterday for daily metrics, otherwise today."""
+        if job == "profile_daily":
+            return self._yesterday()
+        return datetime.now(self.settings.tz).date()
+
+    def _profile_maps(self) -> ProfileMaps:
+        """List every space's profiles once; a run looks profiles up here rather than in the registry."""
+        return {
+            space_id: {profile.profile_id: profile for profile in self.profiles.instagram_profiles(space_id)}
+            for space_id in self.settings.space_ids
+        }
+
+    def _instagram_profiles(
+        self, shard: Optional[Shard] = None, profiles: Optional[ProfileMaps] = None
+    ) -> List[ProfileRecord]:
+        if profiles is None:
+            profiles = self._profile_maps()
+        targets: List[ProfileRecord] = []
         for space_id in self.settings.space_ids:
-            profiles = self.statusbrew.list_profiles(space_id)
-            for profile in profiles:
-                if (profile.get("platform") or profile.get("platform_type")) != "instagram":
+            for profile in profiles.get(space_id, {}).values():
+                if shard is None or shard.contains(space_id, profile.profile_id):
+                    targets.append(profile)
+        return targets
+
+    def _fetch_concurrently(self, calls: Sequence[FetchCall], return_exceptions: bool = False) -> List[List[dict]]:
+        """Run ``calls`` on one async client; results keep the order of ``calls``.
+
+        With ``return_exceptions`` a failed call yields its exception in place
+        of its records instead of failing the whole fan-out.
+        """
+        if not calls:
+            return []
+        add_progress("requests_planned", len(calls))
+
+        async def _tracked(call: FetchCall, client: AsyncStatusbrewClient) -> List[dict]:
+            records = await call(client)
+            add_progress("requests_done")
+            return records
+
+        async def _run() -> List[List[dict]]:
+            async with self.statusbrew.async_client() as client:
+                return await asyncio.gather(
+                    *(_tracked(call, client) for call in calls), return_exceptions=return_exceptions
+                )
+
+        with timed("fetch"):
+            return asyncio.run(_run())
+
+    def _fetch_per_profile(
+        self, targets: Sequence[ProfileRecord], fetch: ProfileFetch, return_exceptions: bool = False
+    ) -> List[List[dict]]:
+        """Fetch records for each target profile; results keep the order of ``targets``."""
+        return self._fetch_per_profile_many(targets, [fetch], return_exceptions)[0]
+
+    def _fetch_per_profile_many(
+        self,
+        targets: Sequence[ProfileRecord],
+        fetches: Sequence[ProfileFetch],
+        return_exceptions: bool = False,
+    ) -> List[List[List[dict]]]:
+        """Run every fetch in ``fetches`` for every target profile in one fan-out.
+
+        Up to ``insights_profile_batch_size`` profiles of one space share a
+        request; multi-profile responses are split back out by their
+        ``profile`` dimension. Returns, per fetch, the records of each target
+        in the order of ``targets``; with ``return_exceptions`` every profile
+        of a failed request gets that request's exception instead.
+        """
+        batches = self._profile_batches(targets)
+        results = self._fetch_concurrently(
+            [
+                lambda client, f=fetch, s=space_id, ids=profile_ids: f(client, s, ids)
+                for fetch in fetches
+                for space_id, profile_ids in batches
+            ],
+            return_exceptions,
+        )
+        return self._split_by_profile(targets, batches, results, len(fetches))
+
+    def _iter_per_profile(
+        self, stream: FetchStream, targets: Sequence[ProfileRecord], fetch: ProfileFetch
+    ) -> Iterator[Tuple[List[ProfileRecord], List[List[dict]]]]:
+        """Stream ``fetch`` over ``targets`` request by request as ``(profiles, records per profile)``.
+
+        Requests are batched as in :meth:`_fetch_per_profile_many` and start
+        right away; each response is split by profile and handed over once it
+        arrives, so only the requests in the stream's window are held at a time.
+        """
+        batches = self._profile_batches(targets)
+        calls: List[FetchCall] = [
+            lambda client, s=space_id, ids=profile_ids: fetch(client, s, ids) for space_id, profile_ids in batches
+        ]
+        return self._split_responses(targets, batches, stream.results(calls))
+
+    @classmethod
+    def _split_responses(
+        cls,
+        targets: Sequence[ProfileRecord],
+        batches: Sequence[Tuple[str, List[str]]],
+        responses: Iterable[List[dict]],
+    ) -> Iterator[Tuple[List[ProfileRecord], List[List[dict]]]]:
+        offset = 0
+        for request, records in zip(batches, responses):
+            profiles = list(targets[offset : offset + len(request[1])])
+            offset += len(profiles)
+            yield profiles, cls._split_by_profile(profiles, [request], [records], 1)[0]
+
+    @staticmethod
+    def _streamed_rows(
+        fetched: Iterable[Tuple[List[ProfileRecord], List[List[dict]]]],
+        build_rows: Callable[[Sequence[ProfileRecord], Sequence[List[dict]]], Iterable[dict]],
+    ) -> Iterator[dict]:
+        """Build rows response by response; waiting for responses is not counted as ``transform``."""
+        transform_seconds = 0.0
+        try:
+            for profiles, results in fetched:
+                start = time.perf_counter()
+                rows = list(build_rows(profiles, results))
+                transform_seconds += time.perf_counter() - start
+                yield from rows
+        finally:
+            record_stage("transform", transform_seconds)
+
+    def _profile_batches(self, targets: Sequence[ProfileRecord]) -> List[Tuple[str, List[str]]]:
+        """Group ``targets`` into per-space requests of up to ``insights_profile_batch_size`` profiles."""
+        batch_size = max(1, self.settings.insights_profile_batch_size)
+        batches: List[Tuple[str, List[str]]] = []
+        for space_id, group in itertools.groupby(targets, key=lambda target: target.space_id):
+            profile_ids = [target.profile_id for target in group]
+            for start in range(0, len(profile_ids), batch_size):
+                batches.append((space_id, profile_ids[start : start + batch_size]))
+        return batches
+
+    @staticmethod
+    def _split_by_profile(
+        targets: Sequence[ProfileRecord],
+        batches: Sequence[Tuple[str, List[str]]],
+        results: Sequence[List[dict]],
+        fetch_count: int,
+    ) -> List[List[List[dict]]]:
+        """Regroup the results of ``fetch_count`` fetches over ``batches`` into records per target."""
+        extract_profile_id = RecordExtractor(PROFILE_ID_FIELDS)
+        per_fetch = []
+        for offset in range(0, len(results), len(batches) or 1):
+            by_profile: Dict[Tuple[str, str], List[dict]] = {}
+            for (space_id, profile_ids), records in zip(batches, results[offset : offset + len(batches)]):
+                if isinstance(records, BaseException):
+                    for profile_id in profile_ids:
+                        by_profile[(space_id, profile_id)] = records
                     continue
-                profile_id = profile.get("id") or profile.get("profile_id") or profile.get("uid")
-                if not profile_id:
-                    logger.warning("Profile ID missing in %s", profile)
+                if len(profile_ids) == 1:
+                    by_profile[(space_id, profile_ids[0])] = list(records)
                     continue
-                username = profile.get("username") or profile.get("handle") or profile.get("name", "")
-                records = self.statusbrew.fetch_profile_daily_metrics(space_id, profile_id, target)
+                split: Dict[str, List[dict]] = {profile_id: [] for profile_id in profile_ids}
                 for record in records:
-                    row = ProfileDailyMetric(
-                        date=target,
-                        space_id=space_id,
-                        profile_id=str(profile_id),
-                        profile_username=username or str(_get(record, "profile_username") or ""),
-                        platform="instagram",
-                        followers=_to_int(_get(record, "followers")),
-                        followers_gained=_to_int(_get(record, "followers_gained")),
-                        unfollowers=_to_int(_get(record, "unfollowers")),
-                        actual_growth=_to_int(_get(record, "actual_growth")),
-                        reach_total=_to_int(_get(record, "reach") or _get(record, "reach_total")),
-                        reach_organic=_to_int(_get(record, "reach_from_organic")),
-                        reach_paid=_to_int(_get(record, "reach_from_paid")),
-                        impressions=_to_int(_get(record, "impressions")),
-                        profile_views=_to_int(_get(record, "profile_views")),
-                        bio_link_clicks=_to_int(_get(record, "bio_link_clicks")),
-                    ).to_dict()
-                    rows.append(row)
-        self.bq.upsert_profile_daily(rows)
-        self.notifier.notify(f"[ProfileDaily] Upserted {len(rows)} rows for {target}")
-        return {"row_count": len(rows), "date": str(target)}
-
-    def run_post_snapshots(self, snapshot_date: Optional[date] = None) -> dict:
-        snapshot = snapshot_date or datetime.now(self.settings.tz).date()
-        since = snapshot - timedelta(days=self.settings.recent_post_lookback_days)
-        rows: List[dict] = []
-        for space_id in self.settings.space_ids:
-            profiles = self.statusbrew.list_profiles(space_id)
-            profile_ids = [
-                p.get("id") or p.get("profile_id") or p.get("uid")
-                for p in profiles
-                if (p.get("platform") or p.get("platform_type")) == "instagram"
-            ]
-            profile_map = {
-                str(p.get("id") or p.get("profile_id") or p.get("uid")): p
-                for p in profiles
-                if (p.get("platform") or p.get("platform_type")) == "instagram"
-            }
-            if not profile_ids:
+                    profile_id = extract_profile_id(record)["profile_id"]
+                    if profile_id in split:
+                        split[profile_id].append(record)
+                    else:
+                        logger.warning("Dropping insights record for unexpected profile %s", profile_id)
+                for profile_id, profile_records in split.items():
+                    by_profile[(space_id, profile_id)] = profile_records
+            per_fetch.append([by_profile.get((target.space_id, target.profile_id), []) for target in targets])
+        return per_fetch or [[] for _ in range(fetch_count)]
+
+    def _run_checkpointed(
+        self,
+        job: str,
+        day: date,
+        spec: TableSpec,
+        targets: Sequence[ProfileRecord],
+        fetch: ProfileFetch,
+        build_rows: Callable[[Sequence[ProfileRecord], Sequence[List[dict]]], Iterable[dict]],
+    ) -> dict:
+        """Fetch and write ``targets`` chunk by chunk, resuming from the checkpoint store.
+
+        Profiles already marked done for ``job`` and ``day`` are skipped. Each
+        chunk of ``checkpoint_flush_profiles`` profiles is written by its own
+        write batch and then marked done, so a late failure keeps the earlier
+        chunks. A failed profile does not stop the others; the run raises at
+        the end so the retry fetches only what is missing. The markers are
+        cleared once every profile succeeded.
+        """
+        done = self.checkpoints.completed(job, day)
+        pending = [target for target in targets if (target.space_id, target.profile_id) not in done]
+        if done:
+            logger.info("Resuming %s for %s: %s profiles already written", job, day, len(targets) - len(pending))
+        chunk_size = max(1, self.settings.checkpoint_flush_profiles)
+        row_count = 0
+        failed: List[Tuple[ProfileRecord, BaseException]] = []
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start : start + chunk_size]
+            results = self._fetch_per_profile(chunk, fetch, return_exceptions=True)
+            fetched: List[Tuple[ProfileRecord, List[dict]]] = []
+            for profile, records in zip(chunk, results):
+                if isinstance(records, BaseException):
+                    failed.append((profile, records))
+                else:
+                    fetched.append((profile, records))
+            if not fetched:
                 continue
-            records = self.statusbrew.fetch_post_snapshots(space_id, profile_ids, since, snapshot)
+            with self.bq.write_batch(partial=True) as batch:
+                rows = build_rows([profile for profile, _ in fetched], [records for _, records in fetched])
+                written = batch.stage(spec, timed_rows(rows))
+            self.checkpoints.mark_done(job, day, [(profile.space_id, profile.profile_id) for profile, _ in fetched])
+            add_progress("rows_written", written)
+            row_count += written
+        if failed:
+            profile, error = failed[0]
+            raise RuntimeError(
+                f"{len(failed)} of {len(pending)} profiles failed for {job} {day} "
+                f"(first: {profile.profile_id}: {error}); {row_count} rows written, a retry resumes from here"
+            ) from error
+        self.checkpoints.clear(job, day)
+        return {"row_count": row_count, "resumed_profiles": len(targets) - len(pending)}
+
+    def _profile_daily_rows(
+        self,
+        targets: Sequence[ProfileRecord],
+        results: Sequence[List[dict]],
+        target: Optional[date] = None,
+    ) -> Iterator[dict]:
+        """Build profile daily rows; without ``target`` each record's own date is used."""
+        extract_profile_daily = RecordExtractor(PROFILE_DAILY_FIELDS)
+        for profile, records in zip(targets, results):
             for record in records:
-                profile_id = str(_get(record, "profile_id") or _get(record, "profile"))
-                profile_info = profile_map.get(profile_id, {})
-                username = profile_info.get("username") or profile_info.get("name") or ""
-                row = PostDailySnapshot(
-                    snapshot_date=snapshot,
-                    space_id=space_id,
-                    profile_id=profile_id,
-                    profile_username=username,
-                    post_id=_safe_str(_get(record, "post_id") or _get(record, "post")),
-                    post_permalink=_safe_str(_get(record, "post_permalink") or _get(record, "permalink")),
-                    post_type=_safe_str(_get(record, "post_type") or _get(record, "type")),
-                    post_published_at=_parse_datetime(
-                        _get(record, "post_published_at") or _get(record, "post_created_at")
-                    ),
-                    reach_total=_to_int(_get(record, "post_reach")),
-                    impressions_total=_to_int(_get(record, "post_impressions")),
-                    likes=_to_int(_get(record, "post_reactions") or _get(record, "post_likes")),
-                    comments=_to_int(_get(record, "post_comments")),
-                    shares=_to_int(_get(record, "post_shares")),
-                    saves=_to_int(_get(record, "post_saved") or _get(record, "post_saves")),
-                    follows=_to_int(_get(record, "post_follows")),
-                    profile_activity_total=_to_int(_get(record, "post_profile_activity_total")),
-                    bio_link_clicks=_to_int(_get(record, "post_profile_activity_bio_link_clicked")),
-                ).to_dict()
-                rows.append(row)
-        self.bq.upsert_post_snapshots(rows)
-        self.notifier.notify(f"[PostSnapshots] Upserted {len(rows)} rows for {snapshot}")
-        return {"row_count": len(rows), "snapshot_date": str(snapshot)}
-
-    def run_follower_demographics(self, snapshot_date: Optional[date] = None) -> dict:
-        snapshot = snapshot_date or datetime.now(self.settings.tz).date()
-        rows: List[dict] = []
-        for space_id in self.settings.space_ids:
-            profiles = self.statusbrew.list_profiles(space_id)
-            for profile in profiles:
-                if (profile.get("platform") or profile.get("platform_type")) != "instagram":
+                values = extract_profile_daily(record)
+                username = values.pop("profile_username")
+                record_date = values.pop("date")
+                if target is None and record_date is None:
+                    logger.warning("Skipping profile daily record without a date for %s", profile.profile_id)
                     continue
-                profile_id = profile.get("id") or profile.get("profile_id") or profile.get("uid")
-                username = profile.get("username") or profile.get("name") or ""
-                records = self.statusbrew.fetch_follower_demographics(space_id, profile_id, snapshot)
-                for record in records:
-                    row = FollowerDemographics(
-                        snapshot_date=snapshot,
-                        space_id=space_id,
-                        profile_id=str(profile_id),
-                        profile_username=username,
-                        age_group=_safe_str(_get(record, "age")),
-                        gender=_safe_str(_get(record, "gender")),
-                        country=_safe_str(_get(record, "country")),
-                        city=_safe_str(_get(record, "city")),
-                        followers=_to_int(_get(record, "followers")),
-                    ).to_dict()
-                    rows.append(row)
-        self.bq.upsert_demographics(rows)
-        self.notifier.notify(f"[Demographics] Upserted {len(rows)} rows for {snapshot}")
-        return {"row_count": len(rows), "snapshot_date": str(snapshot)}
+                yield {
+                    "date": target or record_date,
+                    "space_id": profile.space_id,
+                    "profile_id": profile.profile_id,
+                    "profile_username": profile.username or username,
+                    "platform": "instagram",
+                    **values,
+                }
+
+    @staticmethod
+    def _profile_daily_fetch(target: date) -> ProfileFetch:
+        return lambda client, space_id, profile_ids: client.fetch_profile_daily_metrics(space_id, profile_ids, target)
+
+    def _stage_profile_daily(self, batch: WriteBatch, target: date, shard: Optional[Shard] = None) -> dict:
+        targets = self._instagram_profiles(shard)
+        with FetchStream(self.statusbrew) as stream:
+            rows = self._streamed_rows(
+                self._iter_per_profile(stream, targets, self._profile_daily_fetch(target)),
+                lambda profiles, results: self._profile_daily_rows(profiles, results, target),
+            )
+            row_count = batch.stage(PROFILE_DAILY, rows)
+        add_progress("rows_written", row_count)
+        return {"row_count": row_count, "date": str(target)}
+
+    @timed_job("profile_daily")
+    def run_profile_daily(self, target_date: Optional[date] = None, shard: Optional[Shard] = None) -> dict:
+        target = target_date or self.default_date("profile_daily")
+        if self.checkpoints is None:
+            with self.bq.write_batch(partial=shard is not None) as batch:
+                result = self._stage_profile_daily(batch, target, shard)
+        else:
+            result = self._run_checkpointed(
+                "profile_daily",
+                target,
+                PROFILE_DAILY,
+                self._instagram_profiles(shard),
+                self._profile_daily_fetch(target),
+                lambda targets, results: self._profile_daily_rows(targets, results, target),
+            )
+            result["date"] = str(target)
+        self.notifier.notify(f"[ProfileDaily] Upserted {result['row_count']} rows for {target}")
+        return result
+
+    def _post_snapshot_plan(
+        self, snapshot: date, since: date, profiles: ProfileMaps, shard: Optional[Shard] = None
+    ) -> List[PostRequest]:
+        """One request per space covering every post published in ``since``..``snapshot``."""
+        plan: List[PostRequest] = []
+        targets = self._instagram_profiles(shard, profiles)
+        for space_id, group in itertools.groupby(targets, key=lambda p: p.space_id):
+            plan.append((space_id, [profile.profile_id for profile in group], since, snapshot, None))
+        return plan
+
+    def _incremental_post_plan(
+        self, snapshot: date, profiles: ProfileMaps, shard: Optional[Shard] = None
+    ) -> Tuple[List[PostRequest], int]:
+        """Requests for posts still inside their tracking window plus newly published posts.
+
+        Known posts come from :meth:`BigQueryService.recent_posts`; those
+        published within ``post_tracking_days`` are requested by id, in
+        chunks of ``POST_IDS_PER_REQUEST``. A per-space discovery request
+        covers the last ``post_discovery_days`` so new posts get their first
+        snapshot. Posts that aged out of the tracking window are not fetched.
+        Returns the plan and the number of tracked posts.
+        """
+        tracking_since = snapshot - timedelta(days=self.settings.post_tracking_days)
+        discovery_since = snapshot - timedelta(days=self.settings.post_discovery_days)
+        tracked: Dict[str, List[Tuple[date, str, str]]] = {}
+        for post in self.bq.recent_posts(self.settings.post_tracking_days, as_of=snapshot):
+            published = post.get("post_published_at")
+            published_on = published.date() if isinstance(published, datetime) else published
+            if published_on is None or not tracking_since <= published_on < discovery_since:
+                continue
+            space_id = post.get("space_id")
+            if str(post["profile_id"]) not in profiles.get(space_id, {}):
+                continue
+            if shard is not None and not shard.contains(space_id, str(post["profile_id"])):
+                continue
+            tracked.setdefault(space_id, []).append((published_on, str(post["post_id"]), str(post["profile_id"])))
+
+        plan = self._post_snapshot_plan(snapshot, discovery_since, profiles, shard)
+        for space_id, posts in tracked.items():
+            posts.sort()
+            for start in range(0, len(posts), POST_IDS_PER_REQUEST):
+                chunk = posts[start : start + POST_IDS_PER_REQUEST]
+                profile_ids = sorted({profile_id for _, _, profile_id in chunk})
+                post_ids = [post_id for _, post_id, _ in chunk]
+                plan.append((space_id, profile_ids, chunk[0][0], snapshot, post_ids))
+        return plan, sum(len(posts) for posts in tracked.values())
+
+    @staticmethod
+    def _post_records(stream: FetchStream, plan: Sequence[PostRequest]) -> Iterator[Tuple[str, dict]]:
+        """``(space_id, record)`` for every record of ``plan``, streamed page by page.
+
+        The requests fan out on the stream's async client and start right
+        away; time spent waiting for pages is recorded as the ``fetch`` stage.
+        """
+        chunks = stream.records(
+            [lambda client, request=request: client.aiter_post_snapshots(*request) for request in plan]
+        )
+        return ((plan[index][0], record) for index, records in chunks for record in records)
+
+    def _post_snapshot_rows(
+        self,
+        snapshot: date,
+        records: Iterable[Tuple[str, dict]],
+        profiles: ProfileMaps,
+    ) -> Iterator[dict]:
+        """Stream post snapshot rows from :meth:`_post_records`, once per post.
+
+        Pages are fetched while the rows are consumed, so page waits are timed
+        as ``fetch`` and only the per-record transform as ``transform``.
+        """
+        extract_post_snapshot = RecordExtractor(POST_SNAPSHOT_FIELDS)
+        extract_profile_id = RecordExtractor(PROFILE_ID_FIELDS)
+        emitted = set()
+        transform_seconds = 0.0
+        try:
+            for space_id, record in records:
+                start = time.perf_counter()
+                values = extract_post_snapshot(record)
+                if values["post_id"] in emitted:
+                    transform_seconds += time.perf_counter() - start
+                    continue
+                emitted.add(values["post_id"])
+                profile_id = safe_str(extract_profile_id(record)["profile_id"])
+                profile = profiles.get(space_id, {}).get(profile_id)
+                row = {
+                    "snapshot_date": snapshot,
+                    "space_id": space_id,
+                    "profile_id": profile_id,
+                    "profile_username": profile.username if profile else "",
+                    **values,
+                }
+                row["metrics_fingerprint"] = metrics_fingerprint(row)
+                transform_seconds += time.perf_counter() - start
+                yield row
+        finally:
+            record_stage("transform", transform_seconds)
+
+    def _collect_milestones(
+        self, rows: Iterable[dict], milestone_days: AbstractSet[int], milestones: List[dict]
+    ) -> Iterator[dict]:
+        """Pass ``rows`` through, copying those of posts exactly at a milestone age into ``milestones``."""
+        for row in rows:
+            age = _days_since_post(row["snapshot_date"], row.get("post_published_at"))
+            if age in milestone_days:
+                milestones.append({**row, "milestone_day": age})
+            yield row
+
+    def _post_plan(
+        self, snapshot: date, profiles: ProfileMaps, shard: Optional[Shard] = None
+    ) -> Tuple[date, List[PostRequest], int]:
+        """Earliest publish date covered, the requests and the number of tracked posts for ``snapshot``."""
+        if self.settings.post_incremental_targeting:
+            since = snapshot - timedelta(days=self.settings.post_tracking_days)
+            plan, tracked_posts = self._incremental_post_plan(snapshot, profiles, shard)
+            return since, plan, tracked_posts
+        since = snapshot - timedelta(days=self.settings.recent_post_lookback_days)
+        return since, self._post_snapshot_plan(snapshot, since, profiles, shard), 0
+
+    def _stage_post_rows(
+        self,
+        batch: WriteBatch,
+        snapshot: date,
+        since: date,
+        rows: Iterable[dict],
+        seen: Optional[Dict[str, str]] = None,
+    ) -> dict:
+        """Stage post snapshot (and milestone) rows into ``batch``.
+
+        Change detection applies when ``seen`` is given; it collects every
+        fingerprint so the caller can record them once the batch committed.
+        """
+        milestones: List[dict] = []
+        if self.settings.table_post_milestones and self.settings.post_milestones:
+            # Collected before change detection so milestone rows are kept even when unchanged.
+            rows = self._collect_milestones(rows, set(self.settings.post_milestones), milestones)
+        skipped: List[str] = []
+        if seen is not None:
+            if not len(self.fingerprints):
+                self.fingerprints.seed(self.bq.latest_post_fingerprints(since, snapshot))
+            # Day-7 rows feed the day-7 view and monthly summary, milestone days the milestone table.
+            kept_days = {SUMMARY_POST_DAY, *self.settings.post_milestones}
+            rows = self.fingerprints.changed_only(
+                rows,
+                snapshot,
+                seen,
+                skipped,
+                keep=lambda row: _days_since_post(snapshot, row.get("post_published_at")) in kept_days,
+            )
+        row_count = batch.stage(POST_SNAPSHOTS, rows)
+        milestone_count = batch.stage(POST_MILESTONES, milestones) if milestones else 0
+        add_progress("rows_written", row_count + milestone_count)
+        return {
+            "row_count": row_count,
+            "milestone_rows": milestone_count,
+            "skipped_unchanged": len(skipped),
+            "snapshot_date": str(snapshot),
+        }
+
+    def _stage_post_snapshots(
+        self,
+        batch: WriteBatch,
+        snapshot: date,
+        shard: Optional[Shard] = None,
+        seen: Optional[Dict[str, str]] = None,
+    ) -> dict:
+        profiles = self._profile_maps()
+        since, plan, tracked_posts = self._post_plan(snapshot, profiles, shard)
+        with FetchStream(self.statusbrew) as stream:
+            rows = self._post_snapshot_rows(snapshot, self._post_records(stream, plan), profiles)
+            result = self._stage_post_rows(batch, snapshot, since, rows, seen)
+        return {**result, "tracked_posts": tracked_posts, "requests": len(plan)}
+
+    @timed_job("post_snapshots")
+    def run_post_snapshots(self, snapshot_date: Optional[date] = None, shard: Optional[Shard] = None) -> dict:
+        snapshot = snapshot_date or self.default_date("post_snapshots")
+        seen: Dict[str, str] = {}
+        with self.bq.write_batch(partial=shard is not None) as batch:
+            result = self._stage_post_snapshots(
+                batch, snapshot, shard, seen if self.settings.post_snapshot_skip_unchanged else None
+            )
+        if seen:
+            self.fingerprints.update(seen, snapshot)
+        self.notifier.notify(
+            f"[PostSnapshots] Upserted {result['row_count']} rows for {snapshot} "
+            f"({result['skipped_unchanged']} unchanged skipped, {result['milestone_rows']} milestones)"
+        )
+        return result
+
+    def _demographics_rows(
+        self, snapshot: date, targets: Sequence[ProfileRecord], results: Sequence[List[dict]]
+    ) -> Iterator[dict]:
+        extract_demographics = RecordExtractor(DEMOGRAPHICS_FIELDS)
+        for profile, records in zip(targets, results):
+            for record in records:
+                yield {
+                    "snapshot_date": snapshot,
+                    "space_id": profile.space_id,
+                    "profile_id": profile.profile_id,
+                    "profile_username": profile.username,
+                    **extract_demographics(record),
+                }
+
+    @staticmethod
+    def _demographics_fetch(snapshot: date) -> ProfileFetch:
+        return lambda client, space_id, profile_ids: client.fetch_follower_demographics(space_id, profile_ids, snapshot)
+
+    def _stage_follower_demographics(
+        self, batch: WriteBatch, snapshot: date, shard: Optional[Shard] = None
+    ) -> dict:
+        targets = self._instagram_profiles(shard)
+        with FetchStream(self.statusbrew) as stream:
+            rows = self._streamed_rows(
+                self._iter_per_profile(stream, targets, self._demographics_fetch(snapshot)),
+                lambda profiles, results: self._demographics_rows(snapshot, profiles, results),
+            )
+            row_count = batch.stage(DEMOGRAPHICS, rows)
+        add_progress("rows_written", row_count)
+        return {"row_count": row_count, "snapshot_date": str(snapshot)}
+
+    @timed_job("follower_demographics")
+    def run_follower_demographics(self, snapshot_date: Optional[date] = None, shard: Optional[Shard] = None) -> dict:
+        snapshot = snapshot_date or self.default_date("follower_demographics")
+        if self.checkpoints is None:
+            with self.bq.write_batch(partial=shard is not None) as batch:
+                result = self._stage_follower_demographics(batch, snapshot, shard)
+        else:
+            result = self._run_checkpointed(
+                "follower_demographics",
+                snapshot,
+                DEMOGRAPHICS,
+                self._instagram_profiles(shard),
+                self._demographics_fetch(snapshot),
+                lambda targets, results: self._demographics_rows(snapshot, targets, results),
+            )
+            result["snapshot_date"] = str(snapshot)
+        self.notifier.notify(f"[Demographics] Upserted {result['row_count']} rows for {snapshot}")
+        return result
+
+    @timed_job("daily")
+    def run_daily(self, snapshot_date: Optional[date] = None) -> dict:
+        """Run profile daily (for the day before ``snapshot_date``), post snapshots and demographics together.
+
+        Profiles are listed once and the profile daily, post snapshot and
+        demographics requests all fan out on one shared async client, each
+        kept to a bounded window ahead of staging. Rows are streamed into a
+        single write batch table by table as responses arrive. The result
+        holds each job's result, with the fetch wait, transform and load
+        timings of its own rows; the merge is shared and only appears in the
+        run's overall ``timings``. Profile checkpoints are not used: the run
+        writes everything or nothing.
+        """
+        snapshot = snapshot_date or self.default_date("post_snapshots")
+        target = snapshot - timedelta(days=1)
+        profiles = self._profile_maps()
+        targets = self._instagram_profiles(profiles=profiles)
+        profile_requests = len(self._profile_batches(targets))
+        since, plan, tracked_posts = self._post_plan(snapshot, profiles)
+
+        seen: Dict[str, str] = {}
+        jobs: Dict[str, dict] = {}
+        with FetchStream(self.statusbrew) as stream, self.bq.write_batch() as batch:
+            # Every stream starts its first requests now, so all three fetch while the first is staged.
+            daily_responses = self._iter_per_profile(stream, targets, self._profile_daily_fetch(target))
+            post_records = self._post_records(stream, plan)
+            demographics_responses = self._iter_per_profile(stream, targets, self._demographics_fetch(snapshot))
+            with job_timer("profile_daily") as timings:
+                rows = self._streamed_rows(
+                    daily_responses,
+                    lambda batch_profiles, results: self._profile_daily_rows(batch_profiles, results, target),
+                )
+                row_count = batch.stage(PROFILE_DAILY, rows)
+                add_progress("rows_written", row_count)
+            jobs["profile_daily"] = {"row_count": row_count, "date": str(target), "timings": timings.summary()}
+            with job_timer("post_snapshots") as timings:
+                result = self._stage_post_rows(
+                    batch,
+                    snapshot,
+                    since,
+                    self._post_snapshot_rows(snapshot, post_records, profiles),
+                    seen if self.settings.post_snapshot_skip_unchanged else None,
+                )
+            jobs["post_snapshots"] = {
+                **result,
+                "tracked_posts": tracked_posts,
+                "requests": len(plan),
+                "timings": timings.summary(),
+            }
+            with job_timer("follower_demographics") as timings:
+                rows = self._streamed_rows(
+                    demographics_responses,
+                    lambda batch_profiles, results: self._demographics_rows(snapshot, batch_profiles, results),
+                )
+                row_count = batch.stage(DEMOGRAPHICS, rows)
+                add_progress("rows_written", row_count)
+            jobs["follower_demographics"] = {
+                "row_count": row_count,
+                "snapshot_date": str(snapshot),
+                "timings": timings.summary(),
+            }
+        if seen:
+            self.fingerprints.update(seen, snapshot)
+        self.notifier.notify(
+            f"[Daily] Upserted {jobs['profile_daily']['row_count']} profile daily rows for {target}, "
+            f"{jobs['post_snapshots']['row_count']} post snapshots and "
+            f"{jobs['follower_demographics']['row_count']} demographics rows for {snapshot}"
+        )
+        return {
+            "row_count": sum(job["row_count"] for job in jobs.values()),
+            "snapshot_date": str(snapshot),
+            "profiles": len(targets),
+            "requests": 2 * profile_requests + len(plan),
+            "jobs": jobs,
+        }
+
+    @timed_job("shard")
+    def run_shard(self, job: str, day: date, shard: Shard) -> dict:
+        """Fetch and stage one shard of ``job`` without writing the target tables.
+
+        The returned ``staged`` descriptors are merged by :meth:`commit_shards`
+        on the coordinator. Post change detection is not applied because the
+        fingerprint index is local to each instance.
+        """
+        stage = {
+            "profile_daily": self._stage_profile_daily,
+            "post_snapshots": self._stage_post_snapshots,
+            "follower_demographics": self._stage_follower_demographics,
+        }.get(job)
+        if stage is None:
+            raise ValueError(f"Sharding is not supported for: {job}")
+        batch = self.bq.write_batch()
+        try:
+            result = stage(batch, day, shard)
+        except Exception:
+            batch.discard()
+            raise
+        staged = batch.detach()
+        return {
+            **result,
+            "shard": [shard.index, shard.count],
+            "staged": [table.to_dict(spec) for spec, table in staged],
+        }
+
+    def commit_shards(self, job: str, day: date, results: Sequence[dict | BaseException]) -> dict:
+        """Write every shard's staged tables with one transactional script.
+
+        If any shard failed, the staging tables of the others are dropped and
+        nothing is written.
+        """
+        batch = self.bq.write_batch()
+        failures = [result for result in results if isinstance(result, BaseException)]
+        staged_tables = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            for payload in result["staged"]:
+                batch.adopt(*StagedTable.from_dict(payload))
+                staged_tables += 1
+        if failures:
+            batch.discard()
+            message = f"{len(failures)} of {len(results)} shards of {job} failed: {failures[0]}"
+            raise RuntimeError(message) from failures[0]
+        batch.commit()
+        row_count = sum(result["row_count"] for result in results)
+        add_progress("rows_written", row_count)
+        self.notifier.notify(f"[Sharded] Upserted {row_count} {job} rows for {day} from {len(results)} shards")
+        return {"row_count": row_count, "date": str(day), "shards": len(results), "staged_tables": staged_tables}
+
+    @timed_job("sharded")
+    def run_sharded(self, job: str, day: date, shard_count: int, coordinator: ShardCoordinator) -> dict:
+        """Fan ``job`` out to ``shard_count`` shards and merge their rows once."""
+        if job not in SHARDED_JOBS:
+            raise ValueError(f"Sharding is not supported for: {job}")
+        return self.commit_shards(job, day, coordinator.run(job, day, shard_count))
+
+    def check_backfill(self, start: date, end: date, jobs: Sequence[str]) -> None:
+        """Raise ``ValueError`` for a backfill request that cannot be served."""
+        if start > end:
+            raise ValueError(f"start {start} is after end {end}")
+        unsupported = sorted(set(jobs) - set(BACKFILL_JOBS))
+        if unsupported:
+            raise ValueError(f"Backfill is not supported for: {', '.join(unsupported)}")
+
+    @timed_job("backfill")
+    def run_backfill(self, start: date, end: date, jobs: Sequence[str] = ("profile_daily",)) -> dict:
+        """Backfill ``start``..``end`` with one multi-day request per profile batch and window.
+
+        The range is split into ``backfill_window_days`` windows that are all
+        fetched in one concurrent fan-out; each window is staged separately and
+        every window is written by one transactional script. Only jobs whose
+        history the API can serve are supported; post and demographics
+        snapshots describe "now" and cannot be reconstructed for past days.
+        """
+        self.check_backfill(start, end, jobs)
+        window_days = max(1, self.settings.backfill_window_days)
+        windows: List[Tuple[date, date]] = []
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=window_days - 1))
+            windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+
+        targets = self._instagram_profiles()
+        results = self._fetch_per_profile_many(
+            targets,
+            [
+                lambda client, space_id, profile_ids, since=since, until=until: client.fetch_profile_daily_range(
+                    space_id, profile_ids, since, until
+                )
+                for since, until in windows
+            ],
+        )
+        row_count = 0
+        with self.bq.write_batch() as batch:
+            for (since, until), window_results in zip(windows, results):
+                rows = (
+                    row
+                    for row in self._profile_daily_rows(targets, window_results)
+                    if since <= row["date"] <= until
+                )
+                window_rows = batch.stage(PROFILE_DAILY, timed_rows(rows))
+                add_progress("rows_written", window_rows)
+                logger.info("Staged %s profile daily rows for %s..%s", window_rows, since, until)
+                row_count += window_rows
+        self.notifier.notify(f"[Backfill] Upserted {row_count} profile daily rows for {start}..{end}")
+        return {
+            "row_count": row_count,
+            "start": str(start),
+            "end": str(end),
+            "windows": len(windows),
+            "jobs": list(jobs),
+        }
@@ -1,85 +1,221 @@
 from __future__ import annotations
 
 import logging
+import threading
 from datetime import date
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Hashable, List, Optional
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from .config import get_settings
 from .logging_utils import configure_logging
-from .secrets import fetch_secret
-from .statusbrew_client import StatusbrewClient
-from .bq import BigQueryService
-from .slack import SlackNotifier
-from .jobs import JobRunner
+from .job_queue import JobQueue
+from .services import Services
+from .sharding import SHARDED_JOBS, Shard
+
+if TYPE_CHECKING:
+    from .jobs import JobRunner
 
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-
-token = settings.statusbrew_access_token
-if not token and settings.statusbrew_token_secret_name:
-    token = fetch_secret(settings.statusbrew_token_secret_name, settings.secret_project_id or settings.gcp_project)
-if not token:
-    raise RuntimeError("Statusbrew access token is required.")
-
-statusbrew_client = StatusbrewClient(
-    base_url=settings.statusbrew_base_url,
-    access_token=token,
-    timeout_seconds=settings.http_timeout_seconds,
-    retries=settings.http_retries,
-)
-bq_service = BigQueryService(
-    project=settings.gcp_project,
-    dataset=settings.bigquery_dataset,
-    table_profile_daily=settings.table_profile_daily,
-    table_post_snapshots=settings.table_post_snapshots,
-    table_demographics=settings.table_demographics,
-)
-notifier = SlackNotifier(webhook_url=settings.slack_webhook_url, channel=settings.slack_channel)
-runner = JobRunner(settings, statusbrew_client, bq_service, notifier)
+# Clients, secrets and the BigQuery import are deferred to the first request that needs them.
+services = Services(settings)
+job_queue = JobQueue(max_workers=settings.job_workers, max_history=settings.job_history_limit)
 
 app = FastAPI(title="Statusbrew Instagram Pipeline", version="1.0.0")
 
 
+def _runner() -> "JobRunner":
+    try:
+        return services.runner
+    except Exception as exc:
+        logger.exception("Pipeline services failed to initialise")
+        raise HTTPException(status_code=503, detail=f"Service is not ready: {exc}")
+
+
+@app.on_event("startup")
+def startup_event():
+    if settings.warm_up_on_startup:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+def _warm_up() -> None:
+    try:
+        services.warm_up()
+    except Exception:
+        logger.exception("Warm-up failed; services will be built on first use")
+
+
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
 
 
-@app.post("/job/profile_daily")
-def profile_daily(target_date: Optional[date] = Query(None, description="YYYY-MM-DD")):
-    try:
-        return runner.run_profile_daily(target_date)
-    except Exception as exc:
-        notifier.notify(f"[ProfileDaily] Failed: {exc}")
-        logger.exception("Profile daily job failed")
-        raise HTTPException(status_code=500, detail=str(exc))
+@app.get("/metrics")
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def _submit(kind: str, label: str, key: Hashable, run: Callable[[], dict]) -> dict:
+    """Queue a job run; an identical job still queued or running is returned instead."""
+
+    def _run() -> dict:
+        try:
+            return run()
+        except Exception as exc:
+            services.notifier.notify(f"[{label}] Failed: {exc}")
+            raise
 
+    job, created = job_queue.submit(kind, key, _run)
+    return {**job.to_dict(), "deduplicated": not created}
 
-@app.post("/job/post_snapshots")
-def post_snapshots(snapshot_date: Optional[date] = Query(None, description="YYYY-MM-DD")):
+
+def _shard(shard_index: int, shard_count: int) -> Optional[Shard]:
+    try:
+        shard = Shard(shard_index, shard_count)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return shard if shard.count > 1 else None
+
+
+@app.post("/job/profile_daily", status_code=202)
+def profile_daily(
+    target_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    shard_index: int = Query(0, description="Shard handled by this run"),
+    shard_count: int = Query(1, description="Number of shards profiles are split into"),
+):
+    runner = _runner()
+    target = target_date or runner.default_date("profile_daily")
+    shard = _shard(shard_index, shard_count)
+    return _submit(
+        "profile_daily",
+        "ProfileDaily",
+        ("profile_daily", target, shard),
+        lambda: runner.run_profile_daily(target, shard),
+    )
+
+
+@app.post("/job/post_snapshots", status_code=202)
+def post_snapshots(
+    snapshot_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    shard_index: int = Query(0, description="Shard handled by this run"),
+    shard_count: int = Query(1, description="Number of shards profiles are split into"),
+):
+    runner = _runner()
+    snapshot = snapshot_date or runner.default_date("post_snapshots")
+    shard = _shard(shard_index, shard_count)
+    return _submit(
+        "post_snapshots",
+        "PostSnapshots",
+        ("post_snapshots", snapshot, shard),
+        lambda: runner.run_post_snapshots(snapshot, shard),
+    )
+
+
+@app.post("/job/follower_demographics", status_code=202)
+def follower_demographics(
+    snapshot_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    shard_index: int = Query(0, description="Shard handled by this run"),
+    shard_count: int = Query(1, description="Number of shards profiles are split into"),
+):
+    runner = _runner()
+    snapshot = snapshot_date or runner.default_date("follower_demographics")
+    shard = _shard(shard_index, shard_count)
+    return _submit(
+        "follower_demographics",
+        "Demographics",
+        ("follower_demographics", snapshot, shard),
+        lambda: runner.run_follower_demographics(snapshot, shard),
+    )
+
+
+@app.post("/job/daily", status_code=202)
+def daily(snapshot_date: Optional[date] = Query(None, description="YYYY-MM-DD; profile daily runs for the day before")):
+    runner = _runner()
+    snapshot = snapshot_date or runner.default_date("post_snapshots")
+    return _submit("daily", "Daily", ("daily", snapshot), lambda: runner.run_daily(snapshot))
+
+
+@app.post("/job/{job}/sharded", status_code=202)
+def sharded(
+    job: str,
+    day: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    shard_count: int = Query(settings.shard_count, description="Number of shards to fan out to"),
+):
+    shard_coordinator = services.shard_coordinator
+    if shard_coordinator is None:
+        raise HTTPException(status_code=400, detail="SHARD_BASE_URL is not configured")
+    if job not in SHARDED_JOBS:
+        raise HTTPException(status_code=400, detail=f"Sharding is not supported for: {job}")
+    _shard(0, shard_count)
+    runner = _runner()
+    target = day or runner.default_date(job)
+    return _submit(
+        f"{job}_sharded",
+        "Sharded",
+        (f"{job}_sharded", target),
+        lambda: runner.run_sharded(job, target, shard_count, shard_coordinator),
+    )
+
+
+@app.post("/shard/{job}")
+def shard_run(
+    job: str,
+    day: date = Query(..., description="YYYY-MM-DD"),
+    shard_index: int = Query(..., description="Shard handled by this run"),
+    shard_count: int = Query(..., description="Number of shards profiles are split into"),
+):
+    """Synchronously fetch and stage one shard for a coordinator; target tables are not written."""
+    if job not in SHARDED_JOBS:
+        raise HTTPException(status_code=400, detail=f"Sharding is not supported for: {job}")
+    try:
+        shard = Shard(shard_index, shard_count)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    runner = _runner()
     try:
-        return runner.run_post_snapshots(snapshot_date)
+        return runner.run_shard(job, day, shard)
     except Exception as exc:
-        notifier.notify(f"[PostSnapshots] Failed: {exc}")
-        logger.exception("Post snapshots job failed")
+        logger.exception("Shard %s/%s of %s failed", shard_index, shard_count, job)
         raise HTTPException(status_code=500, detail=str(exc))
 
 
-@app.post("/job/follower_demographics")
-def follower_demographics(snapshot_date: Optional[date] = Query(None, description="YYYY-MM-DD")):
+@app.post("/job/backfill", status_code=202)
+def backfill(
+    start: date = Query(..., description="YYYY-MM-DD"),
+    end: date = Query(..., description="YYYY-MM-DD"),
+    jobs: List[str] = Query(["profile_daily"], description="Jobs to backfill"),
+):
+    runner = _runner()
     try:
-        return runner.run_follower_demographics(snapshot_date)
-    except Exception as exc:
-        notifier.notify(f"[Demographics] Failed: {exc}")
-        logger.exception("Demographics job failed")
-        raise HTTPException(status_code=500, detail=str(exc))
+        runner.check_backfill(start, end, jobs)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    key = ("backfill", start, end, tuple(sorted(jobs)))
+    return _submit("backfill", "Backfill", key, lambda: runner.run_backfill(start, end, jobs))
+
+
+@app.get("/job/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+
+@app.post("/profiles/invalidate")
+def invalidate_profiles(space_id: Optional[str] = Query(None, description="Space ID; all spaces when omitted")):
+    profile_registry = services.built("profile_registry")
+    if profile_registry is not None:
+        profile_registry.invalidate(space_id)
+    return {"invalidated": space_id or "all"}
 
 
 @app.on_event("shutdown")
 def shutdown_event():
-    statusbrew_client.close()
+    job_queue.shutdown(wait=True)
+    services.close()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+
+T = TypeVar("T")
+
+STATUSBREW_REQUEST_SECONDS = Histogram(
+    "statusbrew_request_seconds",
+    "Statusbrew API request latency per attempt",
+    ["endpoint", "method", "status"],
+)
+STATUSBREW_RETRIES = Counter(
+    "statusbrew_request_retries_total",
+    "Statusbrew API request attempts after the first",
+    ["endpoint"],
+)
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Wall time of one job stage (fetch, transform, bq_load, bq_merge)",
+    ["job", "stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+BIGQUERY_BYTES_PROCESSED = Counter(
+    "bigquery_bytes_processed_total",
+    "Bytes processed by BigQuery write scripts",
+    ["job"],
+)
+BIGQUERY_SLOT_MS = Counter(
+    "bigquery_slot_milliseconds_total",
+    "Slot milliseconds consumed by BigQuery write scripts",
+    ["job"],
+)
+
+# Job label used for work that runs outside :func:`job_timer`.
+ADHOC_JOB = "adhoc"
+
+
+class JobTimings:
+    """Stage durations and counters accumulated by one job run, across threads and tasks.
+
+    A job timed inside another job's timer also adds everything to ``parent``.
+    """
+
+    def __init__(self, job: str, parent: Optional["JobTimings"] = None):
+        self.job = job
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {}
+
+    def add_seconds(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+        if self.parent is not None:
+            self.parent.add_seconds(stage, seconds)
+
+    def add_count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+        if self.parent is not None:
+            self.parent.add_count(counter, amount)
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = {f"{stage}_seconds": round(seconds, 3) for stage, seconds in self._seconds.items()}
+            summary.update(self._counters)
+            return summary
+
+
+_current_timings: ContextVar[Optional[JobTimings]] = ContextVar("current_timings", default=None)
+
+
+def _job_label() -> str:
+    timings = _current_timings.get()
+    return timings.job if timings else ADHOC_JOB
+
+
+@contextmanager
+def job_timer(job: str) -> Iterator[JobTimings]:
+    """Collect the stage timings of everything run inside the block for ``job``."""
+    timings = JobTimings(job, parent=_current_timings.get())
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def timed_job(job: str) -> Callable[[Callable[..., dict]], Callable[..., dict]]:
+    """Run the decorated job under :func:`job_timer` and add its summary as ``timings``."""
+
+    def decorator(fn: Callable[..., dict]) -> Callable[..., dict]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs) -> dict:
+            with job_timer(job) as timings:
+                result = fn(*args, **kwargs)
+            result["timings"] = timings.summary()
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(_job_label(), stage).observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_seconds(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def timed_rows(rows: Iterable[T], stage: str = "transform") -> Iterator[T]:
+    """Pass ``rows`` through, recording the time spent producing them as one ``stage`` observation."""
+    elapsed = 0.0
+    iterator = iter(rows)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield row
+    finally:
+        record_stage(stage, elapsed)
+
+
+def observe_request(endpoint: str, method: str, status: str, seconds: float, attempt: int) -> None:
+    STATUSBREW_REQUEST_SECONDS.labels(endpoint, method, status).observe(seconds)
+    if attempt > 1:
+        STATUSBREW_RETRIES.labels(endpoint).inc()
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_count("http_requests")
+        if attempt > 1:
+            timings.add_count("http_retries")
+
+
+def observe_query_job(query_job) -> None:
+    """Record bytes processed and slot-ms from a finished BigQuery query job's statistics."""
+    bytes_processed = getattr(query_job, "total_bytes_processed", None) or 0
+    slot_ms = getattr(query_job, "slot_millis", None) or 0
+    job = _job_label()
+    BIGQUERY_BYTES_PROCESSED.labels(job).inc(bytes_processed)
+    BIGQUERY_SLOT_MS.labels(job).inc(slot_ms)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_count("bq_bytes_processed", int(bytes_processed))
+        timings.add_count("bq_slot_ms", int(slot_ms))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .statusbrew_client import StatusbrewClient
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProfileRecord:
+    space_id: str
+    profile_id: str
+    username: str
+    platform: str
+
+
+def resolve_profile(space_id: str, profile: dict) -> Optional[ProfileRecord]:
+    """Normalise a raw ``social_profiles`` entry, or ``None`` if it has no id."""
+    profile_id = profile.get("id") or profile.get("profile_id") or profile.get("uid")
+    if not profile_id:
+        return None
+    return ProfileRecord(
+        space_id=space_id,
+        profile_id=str(profile_id),
+        username=profile.get("username") or profile.get("handle") or profile.get("name") or "",
+        platform=profile.get("platform") or profile.get("platform_type") or "",
+    )
+
+
+@dataclass
+class _SpaceEntry:
+    fetched_at: float
+    profiles: Dict[str, ProfileRecord]
+
+
+class ProfileRegistry:
+    """Process-wide TTL cache of resolved Instagram profiles per space.
+
+    A space is listed at most once per ``ttl_seconds``; concurrent callers for
+    the same space wait for the in-flight listing instead of issuing their own.
+    ``ttl_seconds <= 0`` disables caching, so every call lists the space
+    again; jobs therefore resolve each space once per run and look profiles up
+    in that snapshot.
+    """
+
+    def __init__(
+        self,
+        statusbrew: StatusbrewClient,
+        ttl_seconds: float = 900,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.statusbrew = statusbrew
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: Dict[str, _SpaceEntry] = {}
+        self._lock = threading.Lock()
+        self._space_locks: Dict[str, threading.Lock] = {}
+
+    def _space_lock(self, space_id: str) -> threading.Lock:
+        with self._lock:
+            return self._space_locks.setdefault(space_id, threading.Lock())
+
+    def _fresh_entry(self, space_id: str) -> Optional[_SpaceEntry]:
+        entry = self._entries.get(space_id)
+        if entry is None or self._clock() - entry.fetched_at >= self.ttl_seconds:
+            return None
+        return entry
+
+    def _load(self, space_id: str) -> _SpaceEntry:
+        profiles: Dict[str, ProfileRecord] = {}
+        for raw in self.statusbrew.list_profiles(space_id):
+            record = resolve_profile(space_id, raw)
+            if record is None:
+                if (raw.get("platform") or raw.get("platform_type")) == "instagram":
+                    logger.warning("Profile ID missing in %s", raw)
+                continue
+            if record.platform != "instagram":
+                continue
+            profiles[record.profile_id] = record
+        logger.debug("Listed %s Instagram profiles for space %s", len(profiles), space_id)
+        return _SpaceEntry(fetched_at=self._clock(), profiles=profiles)
+
+    def _entry(self, space_id: str) -> _SpaceEntry:
+        entry = self._fresh_entry(space_id)
+        if entry is not None:
+            return entry
+        with self._space_lock(space_id):
+            entry = self._fresh_entry(space_id)
+            if entry is None:
+                entry = self._load(space_id)
+                with self._lock:
+                    self._entries[space_id] = entry
+            return entry
+
+    def instagram_profiles(self, space_id: str) -> List[ProfileRecord]:
+        return list(self._entry(space_id).profiles.values())
+
+    def get(self, space_id: str, profile_id: str) -> Optional[ProfileRecord]:
+        return self._entry(space_id).profiles.get(str(profile_id))
+
+    def invalidate(self, space_id: Optional[str] = None) -> None:
+        """Drop one space's listing, or every cached space when ``space_id`` is None."""
+        with self._lock:
+            if space_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(space_id, None)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Reset headers above this are epoch seconds rather than a delay in seconds.
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delay seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every request of a client.
+
+    ``reserve`` hands out a token immediately and returns how long the caller
+    must wait before sending, so sync callers sleep and async callers
+    ``await asyncio.sleep`` on the same state. Rate-limit response headers
+    can pause the bucket until the server's window resets.
+    ``rate_per_second <= 0`` disables the client-side rate and only honours
+    server pauses.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate_per_second <= 0:
+                return pause
+            elapsed = now - self._updated_at
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_per_second)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+            return max(wait, pause)
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause_for(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def observe(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Apply ``Retry-After`` / ``X-RateLimit-*`` headers; return the pause, if any."""
+        pause = parse_retry_after(headers.get("retry-after"))
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if pause is None and remaining is not None and reset is not None:
+            try:
+                if int(float(remaining)) <= 0:
+                    reset_value = float(reset)
+                    if reset_value > _EPOCH_THRESHOLD:
+                        reset_value -= time.time()
+                    pause = max(0.0, reset_value)
+            except ValueError:
+                pause = None
+        if pause:
+            logger.info("Statusbrew rate limit reached; pausing requests for %.1fs", pause)
+            self.pause_for(pause)
+        return pause
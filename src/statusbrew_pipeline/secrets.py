@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import Optional
 
-from google.cloud import secretmanager
-
 
 def fetch_secret(secret_name: str, project_id: Optional[str] = None) -> str:
+    from google.cloud import secretmanager
+
     client = secretmanager.SecretManagerServiceClient()
     if "/" in secret_name:
         name = secret_name
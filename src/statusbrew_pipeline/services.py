@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from .config import Settings
+
+if TYPE_CHECKING:
+    from .bq import BigQueryService
+    from .jobs import JobRunner
+    from .profiles import ProfileRegistry
+    from .sharding import ShardCoordinator
+    from .slack import SlackNotifier
+    from .statusbrew_client import StatusbrewClient
+
+
+logger = logging.getLogger(__name__)
+
+
+class Services:
+    """Pipeline components of the service process, each built on first use.
+
+    Nothing is fetched or imported until a request needs it, so the app
+    answers ``/healthz`` before the Statusbrew token is read from Secret
+    Manager or ``google.cloud.bigquery`` is imported. A component whose
+    construction fails is not cached: the next caller tries again.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._lock = threading.RLock()
+        self._built: Dict[str, Any] = {}
+
+    def _get(self, name: str, build: Callable[[], Any]) -> Any:
+        try:
+            return self._built[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._built:
+                self._built[name] = build()
+            return self._built[name]
+
+    def built(self, name: str) -> Optional[Any]:
+        """The component called ``name`` if it has been built, without building it."""
+        return self._built.get(name)
+
+    @property
+    def statusbrew_token(self) -> str:
+        return self._get("statusbrew_token", self._build_statusbrew_token)
+
+    @property
+    def statusbrew_client(self) -> "StatusbrewClient":
+        return self._get("statusbrew_client", self._build_statusbrew_client)
+
+    @property
+    def bq_service(self) -> "BigQueryService":
+        return self._get("bq_service", self._build_bq_service)
+
+    @property
+    def notifier(self) -> "SlackNotifier":
+        return self._get("notifier", self._build_notifier)
+
+    @property
+    def profile_registry(self) -> "ProfileRegistry":
+        return self._get("profile_registry", self._build_profile_registry)
+
+    @property
+    def runner(self) -> "JobRunner":
+        return self._get("runner", self._build_runner)
+
+    @property
+    def shard_coordinator(self) -> Optional["ShardCoordinator"]:
+        return self._get("shard_coordinator", self._build_shard_coordinator)
+
+    def _build_statusbrew_token(self) -> str:
+        settings = self.settings
+        token = settings.statusbrew_access_token
+        if not token and settings.statusbrew_token_secret_name:
+            from .secrets import fetch_secret
+
+            token = fetch_secret(
+                settings.statusbrew_token_secret_name, settings.secret_project_id or settings.gcp_project
+            )
+        if not token:
+            raise RuntimeError("Statusbrew access token is required.")
+        return token
+
+    def _build_statusbrew_client(self) -> "StatusbrewClient":
+        from .cache import ResponseCache
+        from .ratelimit import TokenBucket
+        from .statusbrew_client import StatusbrewClient
+
+        settings = self.settings
+        return StatusbrewClient(
+            base_url=settings.statusbrew_base_url,
+            access_token=self.statusbrew_token,
+            timeout_seconds=settings.http_timeout_seconds,
+            retries=settings.http_retries,
+            max_concurrency=settings.statusbrew_max_concurrency,
+            max_concurrency_per_space=settings.statusbrew_max_concurrency_per_space,
+            rate_limiter=TokenBucket(
+                rate_per_second=settings.statusbrew_rate_limit_per_second,
+                burst=settings.statusbrew_rate_limit_burst,
+            ),
+            cache=(
+                ResponseCache(
+                    settings.response_cache_dir,
+                    max_bytes=settings.response_cache_max_mb * 1024 * 1024,
+                    tz=settings.tz,
+                )
+                if settings.response_cache_dir
+                else None
+            ),
+        )
+
+    def _build_bq_service(self) -> "BigQueryService":
+        from .bq import BigQueryService
+
+        settings = self.settings
+        return BigQueryService(
+            project=settings.gcp_project,
+            dataset=settings.bigquery_dataset,
+            table_profile_daily=settings.table_profile_daily,
+            table_post_snapshots=settings.table_post_snapshots,
+            table_demographics=settings.table_demographics,
+            load_chunk_rows=settings.bq_load_chunk_rows,
+            partition_replace=settings.bq_partition_replace_tables,
+            staging_expiration=timedelta(hours=settings.bq_staging_expiration_hours),
+            table_monthly_summary=settings.table_monthly_summary,
+            table_post_milestones=settings.table_post_milestones,
+            table_demographics_history=settings.table_demographics_history,
+        )
+
+    def _build_notifier(self) -> "SlackNotifier":
+        from .slack import SlackNotifier
+
+        settings = self.settings
+        return SlackNotifier(
+            webhook_url=settings.slack_webhook_url,
+            channel=settings.slack_channel,
+            max_queue=settings.slack_queue_size,
+            coalesce_seconds=settings.slack_coalesce_seconds,
+        )
+
+    def _build_profile_registry(self) -> "ProfileRegistry":
+        from .profiles import ProfileRegistry
+
+        return ProfileRegistry(self.statusbrew_client, ttl_seconds=self.settings.profile_cache_ttl_seconds)
+
+    def _build_runner(self) -> "JobRunner":
+        from .jobs import JobRunner
+
+        return JobRunner(self.settings, self.statusbrew_client, self.bq_service, self.notifier, self.profile_registry)
+
+    def _build_shard_coordinator(self) -> Optional["ShardCoordinator"]:
+        from .sharding import ShardCoordinator
+
+        if not self.settings.shard_base_url:
+            return None
+        return ShardCoordinator(self.settings.shard_base_url, timeout_seconds=self.settings.shard_timeout_seconds)
+
+    def warm_up(self) -> None:
+        """Build every component now instead of on the first job request."""
+        self.runner
+        self.shard_coordinator
+        logger.info("Pipeline services warmed up")
+
+    def close(self) -> None:
+        """Flush pending Slack notifications and close the clients that were built."""
+        for name in ("notifier", "statusbrew_client"):
+            component = self.built(name)
+            if component is not None:
+                component.close()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, List, Optional, Union
+
+if TYPE_CHECKING:
+    import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# Jobs that can be split across instances by profile shard.
+SHARDED_JOBS = ("profile_daily", "post_snapshots", "follower_demographics")
+
+
+def shard_of(space_id: str, profile_id: str, shard_count: int) -> int:
+    """Stable shard number of a profile; the same on every instance and Python process."""
+    digest = hashlib.blake2b(f"{space_id}/{profile_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Profile slice ``index`` of ``count`` handled by one job run."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}")
+
+    def contains(self, space_id: str, profile_id: str) -> bool:
+        return self.count == 1 or shard_of(space_id, profile_id, self.count) == self.index
+
+
+class ShardCoordinator:
+    """Fan a job out to ``shard_count`` service instances and collect their staged tables.
+
+    Each shard is one synchronous ``POST {base_url}/shard/{job}`` call that
+    fetches and stages its profiles without writing to the target tables;
+    the caller merges every shard's staging tables with one write batch.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 3600,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self.transport = transport
+
+    async def _run_shards(self, job: str, day: date, shard_count: int) -> List[Union[dict, BaseException]]:
+        import httpx
+
+        async with httpx.AsyncClient(
+            base_url=self.base_url, timeout=self.timeout_seconds, transport=self.transport
+        ) as client:
+
+            async def _run(index: int) -> dict:
+                params = {"day": str(day), "shard_index": index, "shard_count": shard_count}
+                response = await client.post(f"/shard/{job}", params=params)
+                response.raise_for_status()
+                logger.info("Shard %s/%s of %s finished", index, shard_count, job)
+                return response.json()
+
+            return await asyncio.gather(*(_run(index) for index in range(shard_count)), return_exceptions=True)
+
+    def run(self, job: str, day: date, shard_count: int) -> List[Union[dict, BaseException]]:
+        """Result of every shard in shard order, or the exception a shard failed with.
+
+        Failures are returned rather than raised so the caller can discard the
+        staging tables of the shards that did succeed.
+        """
+        return asyncio.run(self._run_shards(job, day, shard_count))
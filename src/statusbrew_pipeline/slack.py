@@ -1,28 +1,130 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import queue
+import threading
+import time
+from typing import List, Optional
 
 import httpx
 
 
 logger = logging.getLogger(__name__)
 
+# Queue marker asking the sender thread to post what it has and exit.
+_STOP = object()
+
 
 class SlackNotifier:
-    def __init__(self, webhook_url: Optional[str], channel: Optional[str] = None):
+    """Posts to a Slack webhook from a background thread so callers never wait on Slack.
+
+    ``notify`` only enqueues. The sender takes the first pending message,
+    collects whatever else arrives within ``coalesce_seconds`` (up to
+    ``max_batch`` messages) and posts them as one newline-joined message over
+    a persistent connection. When ``max_queue`` messages are already pending
+    new ones are dropped with a warning. ``close`` posts everything still
+    queued before returning.
+    """
+
+    def __init__(
+        self,
+        webhook_url: Optional[str],
+        channel: Optional[str] = None,
+        max_queue: int = 1000,
+        coalesce_seconds: float = 2.0,
+        max_batch: int = 20,
+        timeout_seconds: float = 10,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
         self.webhook_url = webhook_url
         self.channel = channel
+        self.coalesce_seconds = coalesce_seconds
+        self.max_batch = max(1, max_batch)
+        self.timeout_seconds = timeout_seconds
+        self.transport = transport
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.Client] = None
+        self._closed = False
 
     def notify(self, text: str) -> None:
         if not self.webhook_url:
             logger.debug("Slack webhook not configured; skipping notification.")
             return
-        payload = {"text": text}
+        if self._closed:
+            logger.warning("Slack notifier is closed; dropping notification: %s", text)
+            return
+        self._ensure_sender()
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            logger.warning("Slack notification queue is full; dropping notification: %s", text)
+
+    def _ensure_sender(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._client = httpx.Client(timeout=self.timeout_seconds, transport=self.transport)
+                self._thread = threading.Thread(target=self._send_loop, name="slack-notifier", daemon=True)
+                self._thread.start()
+
+    def _send_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[str] = [first]
+            deadline = time.monotonic() + self.coalesce_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._post(batch)
+        self._drain()
+
+    def _drain(self) -> None:
+        """Post messages queued after the stop marker, which ``close`` still promised to deliver."""
+        batch: List[str] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.max_batch):
+            self._post(batch[start : start + self.max_batch])
+
+    def _post(self, messages: List[str]) -> None:
+        payload = {"text": "\n".join(messages)}
         if self.channel:
             payload["channel"] = self.channel
         try:
-            response = httpx.post(self.webhook_url, json=payload, timeout=10)
+            response = self._client.post(self.webhook_url, json=payload)
             response.raise_for_status()
         except Exception:
-            logger.exception("Failed to send Slack notification")
+            logger.exception("Failed to send %s Slack notification(s)", len(messages))
+
+    def close(self, timeout: float = 30) -> None:
+        """Post every queued message, then stop the sender and its connection pool."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Slack notification queue did not drain before shutdown")
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Slack notifier did not finish flushing within %ss", timeout)
+            return
+        self._client.close()
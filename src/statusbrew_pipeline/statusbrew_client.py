@@ -1,18 +1,221 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
 import httpx
-from tenacity import Retrying, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    stop_after_attempt,
+    wait_exponential,
+    retry_if_exception_type,
+)
+from tenacity.wait import wait_base
+
+from .cache import ResponseCache
+from .metrics import observe_request
+from .ratelimit import TokenBucket
 
 
 logger = logging.getLogger(__name__)
 
 
+PROFILE_DAILY_METRICS = [
+    "followers",
+    "followers_gained",
+    "unfollowers",
+    "actual_growth",
+    "reach",
+    "reach_from_organic",
+    "reach_from_paid",
+    "impressions",
+    "profile_views",
+    "bio_link_clicks",
+]
+
+POST_SNAPSHOT_METRICS = [
+    "post_reach",
+    "post_impressions",
+    "post_reactions",
+    "post_comments",
+    "post_shares",
+    "post_saved",
+    "post_follows",
+    "post_profile_activity_total",
+    "post_profile_activity_bio_link_clicked",
+]
+
+
+# Longest server-requested Retry-After we are willing to sleep through.
+MAX_RETRY_AFTER_SECONDS = 300
+
+
 class StatusbrewError(Exception):
-    pass
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class StatusbrewRetryableError(StatusbrewError):
+    """429, 5xx or transport failure; anything else fails fast."""
+
+
+class wait_retry_after(wait_base):
+    """Wait for the server's ``Retry-After`` when it is positive, else fall back.
+
+    A zero (or already past) ``Retry-After`` falls back too, so it cannot
+    turn the retries into an immediate burst.
+    """
+
+    def __init__(self, fallback: wait_base, max_wait: float = MAX_RETRY_AFTER_SECONDS):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None and retry_after > 0:
+            return min(retry_after, self.max_wait)
+        return self.fallback(retry_state)
+
+
+def _retry_kwargs(retries: int) -> Dict[str, Any]:
+    return dict(
+        reraise=True,
+        stop=stop_after_attempt(retries),
+        wait=wait_retry_after(wait_exponential(multiplier=1, min=1, max=10)),
+        retry=retry_if_exception_type(StatusbrewRetryableError),
+    )
+
+
+def _transport_error(method: str, url: str, exc: httpx.HTTPError) -> StatusbrewError:
+    logger.warning("Statusbrew transport error on %s %s: %s", method, url, exc)
+    if isinstance(exc, httpx.TransportError):
+        return StatusbrewRetryableError(str(exc))
+    return StatusbrewError(str(exc))
+
+
+def _parse_response(method: str, url: str, response: httpx.Response, rate_limiter: TokenBucket) -> dict:
+    retry_after = rate_limiter.observe(response.headers)
+    if response.status_code == 429 or response.status_code >= 500:
+        message = f"{response.status_code} {response.reason_phrase} for {method} {url}"
+        logger.warning("Statusbrew API error (retryable): %s", message)
+        raise StatusbrewRetryableError(message, response.status_code, retry_after)
+    if response.is_error:
+        message = f"{response.status_code} {response.reason_phrase} for {method} {url}: {response.text[:500]}"
+        logger.error("Statusbrew API error: %s", message)
+        raise StatusbrewError(message, response.status_code)
+    return response.json()
+
+
+def _endpoint(url: str) -> str:
+    """Metrics label of a request path: its last segment, without ids (``insights``, ``social_profiles``)."""
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _headers(access_token: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+    }
+
+
+def _insights_body(
+    metrics: List[str],
+    dimensions: List[str],
+    time_range: Dict[str, str],
+    filters: Optional[Dict[str, Any]] = None,
+    granularity: Optional[str] = None,
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "metrics": metrics,
+        "dimensions": dimensions,
+        "time_range": time_range,
+    }
+    if filters:
+        body["filters"] = filters
+    if granularity:
+        body["granularity"] = granularity
+    return body
+
+
+def _profiles_from_response(data: Any) -> List[dict]:
+    return data.get("data") or data.get("profiles") or data
+
+
+def _rows_from_response(data: Any) -> List[dict]:
+    if isinstance(data, list):
+        return data
+    return data.get("data") or data.get("rows") or []
+
+
+def _next_cursor(data: Any) -> Optional[str]:
+    """Return the next-page cursor of an insights response, if any."""
+    if not isinstance(data, dict):
+        return None
+    if data.get("next_cursor"):
+        return data["next_cursor"]
+    for key in ("paging", "pagination", "meta"):
+        section = data.get(key)
+        if isinstance(section, dict):
+            cursor = section.get("next_cursor") or section.get("cursor") or section.get("next")
+            if cursor:
+                return cursor
+    return None
+
+
+def _next_page_body(body: Dict[str, Any], data: Any, seen: set) -> Optional[Dict[str, Any]]:
+    cursor = _next_cursor(data)
+    if not cursor:
+        return None
+    if cursor in seen:
+        logger.warning("Statusbrew returned a repeated cursor %s; stopping pagination", cursor)
+        return None
+    seen.add(cursor)
+    return {**body, "cursor": cursor}
+
+
+def _as_profile_ids(profile_ids: str | List[str]) -> List[str]:
+    return list(profile_ids) if isinstance(profile_ids, (list, tuple)) else [profile_ids]
+
+
+def _profile_daily_query(profile_ids: str | List[str], since: date, until: date) -> Dict[str, Any]:
+    return dict(
+        metrics=PROFILE_DAILY_METRICS,
+        dimensions=["date", "profile"],
+        time_range={"since": str(since), "until": str(until)},
+        filters={"profile_ids": _as_profile_ids(profile_ids), "platforms": ["instagram"]},
+        granularity="day",
+    )
+
+
+def _post_snapshots_query(
+    profile_ids: List[str], since: date, until: date, post_ids: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    filters: Dict[str, Any] = {"profile_ids": profile_ids, "platforms": ["instagram"]}
+    if post_ids:
+        filters["post_ids"] = post_ids
+    return dict(
+        metrics=POST_SNAPSHOT_METRICS,
+        dimensions=["post", "profile"],
+        time_range={"since": str(since), "until": str(until)},
+        filters=filters,
+    )
+
+
+def _follower_demographics_query(profile_ids: str | List[str], snapshot_date: date) -> Dict[str, Any]:
+    return dict(
+        metrics=["followers"],
+        dimensions=["profile", "gender", "age", "country", "city"],
+        time_range={"since": str(snapshot_date), "until": str(snapshot_date)},
+        filters={"profile_ids": _as_profile_ids(profile_ids), "platforms": ["instagram"]},
+    )
 
 
 class StatusbrewClient:
@@ -22,40 +225,72 @@ class StatusbrewClient:
         access_token: str,
         timeout_seconds: int = 60,
         retries: int = 3,
+        max_concurrency: int = 8,
+        max_concurrency_per_space: int = 4,
+        transport: Optional[httpx.BaseTransport] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[ResponseCache] = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.timeout_seconds = timeout_seconds
+        self.access_token = access_token
+        self.cache = cache
+        self.transport = transport
         self.client = httpx.Client(
             base_url=self.base_url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-            },
+            headers=_headers(access_token),
             timeout=timeout_seconds,
+            transport=transport,
         )
         self.retries = retries
-        self.retryer = Retrying(
-            reraise=True,
-            stop=stop_after_attempt(self.retries),
-            wait=wait_exponential(multiplier=1, min=1, max=10),
-            retry=retry_if_exception_type(StatusbrewError),
-        )
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_space = max_concurrency_per_space
+        self.rate_limiter = rate_limiter or TokenBucket(rate_per_second=0)
+        self.retryer = Retrying(**_retry_kwargs(self.retries))
 
     def _request(self, method: str, url: str, **kwargs) -> dict:
         for attempt in self.retryer:
             with attempt:
+                self.rate_limiter.acquire()
+                start, status = time.perf_counter(), "error"
                 try:
                     response = self.client.request(method, url, **kwargs)
-                    response.raise_for_status()
-                    return response.json()
+                    status = str(response.status_code)
                 except httpx.HTTPError as exc:
-                    logger.error("Statusbrew API error: %s", exc)
-                    raise StatusbrewError(str(exc)) from exc
+                    raise _transport_error(method, url, exc) from exc
+                finally:
+                    elapsed = time.perf_counter() - start
+                    observe_request(_endpoint(url), method, status, elapsed, attempt.retry_state.attempt_number)
+                return _parse_response(method, url, response, self.rate_limiter)
 
     def list_profiles(self, space_id: str) -> List[dict]:
         path = f"/v1/spaces/{space_id}/social_profiles"
         data = self._request("GET", path)
-        return data.get("data") or data.get("profiles") or data
+        return _profiles_from_response(data)
+
+    def iter_insights(
+        self,
+        space_id: str,
+        metrics: List[str],
+        dimensions: List[str],
+        time_range: Dict[str, str],
+        filters: Optional[Dict[str, Any]] = None,
+        granularity: Optional[str] = None,
+    ) -> Iterator[dict]:
+        """Yield insights rows lazily, following next-page cursors."""
+        body: Optional[Dict[str, Any]] = _insights_body(metrics, dimensions, time_range, filters, granularity)
+        path = f"/v1/spaces/{space_id}/insights"
+        seen: set = set()
+        while body is not None:
+            logger.debug("Insights request payload: %s", body)
+            key = self.cache.key(space_id, body) if self.cache and self.cache.cacheable(body) else None
+            data = self.cache.get(key) if key else None
+            if data is None:
+                data = self._request("POST", path, json=body)
+                if key:
+                    self.cache.put(key, data)
+            yield from _rows_from_response(data)
+            body = _next_page_body(body, data, seen)
 
     def insights(
         self,
@@ -66,42 +301,29 @@ class StatusbrewClient:
         filters: Optional[Dict[str, Any]] = None,
         granularity: Optional[str] = None,
     ) -> List[dict]:
-        body: Dict[str, Any] = {
-            "metrics": metrics,
-            "dimensions": dimensions,
-            "time_range": time_range,
-        }
-        if filters:
-            body["filters"] = filters
-        if granularity:
-            body["granularity"] = granularity
-        path = f"/v1/spaces/{space_id}/insights"
-        logger.debug("Insights request payload: %s", body)
-        data = self._request("POST", path, json=body)
-        return data.get("data") or data.get("rows") or data
+        return list(self.iter_insights(space_id, metrics, dimensions, time_range, filters, granularity))
 
     def fetch_profile_daily_metrics(
-        self, space_id: str, profile_id: str, target_date: date
+        self, space_id: str, profile_ids: str | List[str], target_date: date
     ) -> List[dict]:
-        return self.insights(
-            space_id=space_id,
-            metrics=[
-                "followers",
-                "followers_gained",
-                "unfollowers",
-                "actual_growth",
-                "reach",
-                "reach_from_organic",
-                "reach_from_paid",
-                "impressions",
-                "profile_views",
-                "bio_link_clicks",
-            ],
-            dimensions=["date", "profile"],
-            time_range={"since": str(target_date), "until": str(target_date)},
-            filters={"profile_ids": [profile_id], "platforms": ["instagram"]},
-            granularity="day",
-        )
+        return self.fetch_profile_daily_range(space_id, profile_ids, target_date, target_date)
+
+    def fetch_profile_daily_range(
+        self, space_id: str, profile_ids: str | List[str], since: date, until: date
+    ) -> List[dict]:
+        """Daily profile metrics for every day in ``since``..``until`` (one row per date)."""
+        return self.insights(space_id=space_id, **_profile_daily_query(profile_ids, since, until))
+
+    def iter_post_snapshots(
+        self,
+        space_id: str,
+        profile_ids: List[str],
+        since: date,
+        until: date,
+        post_ids: Optional[List[str]] = None,
+    ) -> Iterator[dict]:
+        """Post metrics for posts published in ``since``..``until``, optionally only ``post_ids``."""
+        return self.iter_insights(space_id=space_id, **_post_snapshots_query(profile_ids, since, until, post_ids))
 
     def fetch_post_snapshots(
         self,
@@ -109,33 +331,169 @@ class StatusbrewClient:
         profile_ids: List[str],
         since: date,
         until: date,
+        post_ids: Optional[List[str]] = None,
     ) -> List[dict]:
-        return self.insights(
-            space_id=space_id,
-            metrics=[
-                "post_reach",
-                "post_impressions",
-                "post_reactions",
-                "post_comments",
-                "post_shares",
-                "post_saved",
-                "post_follows",
-                "post_profile_activity_total",
-                "post_profile_activity_bio_link_clicked",
-            ],
-            dimensions=["post", "profile"],
-            time_range={"since": str(since), "until": str(until)},
-            filters={"profile_ids": profile_ids, "platforms": ["instagram"]},
-        )
+        return list(self.iter_post_snapshots(space_id, profile_ids, since, until, post_ids))
+
+    def fetch_follower_demographics(
+        self, space_id: str, profile_ids: str | List[str], snapshot_date: date
+    ) -> List[dict]:
+        return self.insights(space_id=space_id, **_follower_demographics_query(profile_ids, snapshot_date))
 
-    def fetch_follower_demographics(self, space_id: str, profile_id: str, snapshot_date: date) -> List[dict]:
-        return self.insights(
-            space_id=space_id,
-            metrics=["followers"],
-            dimensions=["profile", "gender", "age", "country", "city"],
-            time_range={"since": str(snapshot_date), "until": str(snapshot_date)},
-            filters={"profile_ids": [profile_id], "platforms": ["instagram"]},
+    def async_client(self) -> "AsyncStatusbrewClient":
+        """Build an async client sharing credentials, retries, limits and rate limiter.
+
+        The returned client owns an ``httpx.AsyncClient`` bound to the running
+        event loop, so create it inside the loop and close it with ``aclose``
+        (or use it as an async context manager).
+        """
+        return AsyncStatusbrewClient(
+            base_url=self.base_url,
+            access_token=self.access_token,
+            timeout_seconds=self.timeout_seconds,
+            retries=self.retries,
+            max_concurrency=self.max_concurrency,
+            max_concurrency_per_space=self.max_concurrency_per_space,
+            # httpx.MockTransport serves both sync and async clients.
+            transport=self.transport if isinstance(self.transport, httpx.AsyncBaseTransport) else None,
+            rate_limiter=self.rate_limiter,
+            cache=self.cache,
         )
 
     def close(self) -> None:
         self.client.close()
+
+
+class AsyncStatusbrewClient:
+    """asyncio counterpart of :class:`StatusbrewClient` for fanning out calls.
+
+    In-flight requests are capped both overall (``max_concurrency``) and per
+    space (``max_concurrency_per_space``).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        access_token: str,
+        timeout_seconds: int = 60,
+        retries: int = 3,
+        max_concurrency: int = 8,
+        max_concurrency_per_space: int = 4,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self.cache = cache
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=_headers(access_token),
+            timeout=timeout_seconds,
+            transport=transport,
+        )
+        self.retries = retries
+        self.rate_limiter = rate_limiter or TokenBucket(rate_per_second=0)
+        self.max_concurrency_per_space = max(1, max_concurrency_per_space)
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._space_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncStatusbrewClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _space_semaphore(self, space_id: str) -> asyncio.Semaphore:
+        semaphore = self._space_semaphores.get(space_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_space)
+            self._space_semaphores[space_id] = semaphore
+        return semaphore
+
+    async def _request(self, space_id: str, method: str, url: str, **kwargs) -> dict:
+        async with self._space_semaphore(space_id), self._semaphore:
+            async for attempt in AsyncRetrying(**_retry_kwargs(self.retries)):
+                with attempt:
+                    await self.rate_limiter.acquire_async()
+                    start, status = time.perf_counter(), "error"
+                    try:
+                        response = await self.client.request(method, url, **kwargs)
+                        status = str(response.status_code)
+                    except httpx.HTTPError as exc:
+                        raise _transport_error(method, url, exc) from exc
+                    finally:
+                        elapsed = time.perf_counter() - start
+                        observe_request(_endpoint(url), method, status, elapsed, attempt.retry_state.attempt_number)
+                    return _parse_response(method, url, response, self.rate_limiter)
+
+    async def list_profiles(self, space_id: str) -> List[dict]:
+        path = f"/v1/spaces/{space_id}/social_profiles"
+        data = await self._request(space_id, "GET", path)
+        return _profiles_from_response(data)
+
+    async def aiter_insights(
+        self,
+        space_id: str,
+        metrics: List[str],
+        dimensions: List[str],
+        time_range: Dict[str, str],
+        filters: Optional[Dict[str, Any]] = None,
+        granularity: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        body: Optional[Dict[str, Any]] = _insights_body(metrics, dimensions, time_range, filters, granularity)
+        path = f"/v1/spaces/{space_id}/insights"
+        seen: set = set()
+        while body is not None:
+            logger.debug("Insights request payload: %s", body)
+            key = self.cache.key(space_id, body) if self.cache and self.cache.cacheable(body) else None
+            data = self.cache.get(key) if key else None
+            if data is None:
+                data = await self._request(space_id, "POST", path, json=body)
+                if key:
+                    self.cache.put(key, data)
+            for row in _rows_from_response(data):
+                yield row
+            body = _next_page_body(body, data, seen)
+
+    async def insights(
+        self,
+        space_id: str,
+        metrics: List[str],
+        dimensions: List[str],
+        time_range: Dict[str, str],
+        filters: Optional[Dict[str, Any]] = None,
+        granularity: Optional[str] = None,
+    ) -> List[dict]:
+        return [
+            row async for row in self.aiter_insights(space_id, metrics, dimensions, time_range, filters, granularity)
+        ]
+
+    async def fetch_profile_daily_metrics(
+        self, space_id: str, profile_ids: str | List[str], target_date: date
+    ) -> List[dict]:
+        return await self.fetch_profile_daily_range(space_id, profile_ids, target_date, target_date)
+
+    async def fetch_profile_daily_range(
+        self, space_id: str, profile_ids: str | List[str], since: date, until: date
+    ) -> List[dict]:
+        return await self.insights(space_id=space_id, **_profile_daily_query(profile_ids, since, until))
+
+    def aiter_post_snapshots(
+        self,
+        space_id: str,
+        profile_ids: List[str],
+        since: date,
+        until: date,
+        post_ids: Optional[List[str]] = None,
+    ) -> AsyncIterator[dict]:
+        """Post metrics for posts published in ``since``..``until``, optionally only ``post_ids``."""
+        return self.aiter_insights(space_id=space_id, **_post_snapshots_query(profile_ids, since, until, post_ids))
+
+    async def fetch_follower_demographics(
+        self, space_id: str, profile_ids: str | List[str], snapshot_date: date
+    ) -> List[dict]:
+        return await self.insights(space_id=space_id, **_follower_demographics_query(profile_ids, snapshot_date))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -21,6 +21,29 @@ PROFILE_DAILY_SCHEMA = [
 ]
 
 POST_SNAPSHOT_SCHEMA = [
+    bigquery.SchemaField("snapshot_date", "DATE"),
+    bigquery.SchemaField("space_id", "STRING"),
+    bigquery.SchemaField("profile_id", "STRING"),
+    bigquery.SchemaField("profile_username", "STRING"),
+    bigquery.SchemaField("post_id", "STRING"),
+    bigquery.SchemaField("post_permalink", "STRING"),
+    bigquery.SchemaField("post_type", "STRING"),
+    bigquery.SchemaField("post_published_at", "TIMESTAMP"),
+    bigquery.SchemaField("reach_total", "INT64"),
+    bigquery.SchemaField("impressions_total", "INT64"),
+    bigquery.SchemaField("likes", "INT64"),
+    bigquery.SchemaField("comments", "INT64"),
+    bigquery.SchemaField("shares", "INT64"),
+    bigquery.SchemaField("saves", "INT64"),
+    bigquery.SchemaField("follows", "INT64"),
+    bigquery.SchemaField("profile_activity_total", "INT64"),
+    bigquery.SchemaField("bio_link_clicks", "INT64"),
+    bigquery.SchemaField("metrics_fingerprint", "STRING"),
+    bigquery.SchemaField("created_at", "TIMESTAMP"),
+]
+
+POST_MILESTONE_SCHEMA = [
+    bigquery.SchemaField("milestone_day", "INT64"),
     bigquery.SchemaField("snapshot_date", "DATE"),
     bigquery.SchemaField("space_id", "STRING"),
     bigquery.SchemaField("profile_id", "STRING"),
@@ -53,3 +76,20 @@ FOLLOWER_DEMOGRAPHICS_SCHEMA = [
     bigquery.SchemaField("followers", "INT64"),
     bigquery.SchemaField("created_at", "TIMESTAMP"),
 ]
+
+# Change-only demographics: a row per breakdown value, valid from ``valid_from``
+# until the day before ``valid_to`` (NULL while it is still current).
+FOLLOWER_DEMOGRAPHICS_HISTORY_SCHEMA = [
+    bigquery.SchemaField("valid_from", "DATE"),
+    bigquery.SchemaField("valid_to", "DATE"),
+    bigquery.SchemaField("space_id", "STRING"),
+    bigquery.SchemaField("profile_id", "STRING"),
+    bigquery.SchemaField("profile_username", "STRING"),
+    bigquery.SchemaField("age_group", "STRING"),
+    bigquery.SchemaField("gender", "STRING"),
+    bigquery.SchemaField("country", "STRING"),
+    bigquery.SchemaField("city", "STRING"),
+    bigquery.SchemaField("followers", "INT64"),
+    bigquery.SchemaField("created_at", "TIMESTAMP"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP"),
+]
@@ -0,0 +1,223 @@
+import io
+from datetime import date, datetime, timezone
+
+import pyarrow.parquet as pq
+import pytest
+
+from statusbrew_pipeline.bq import DEMOGRAPHICS, POST_SNAPSHOTS, PROFILE_DAILY, BigQueryService, StagedTable
+from statusbrew_pipeline.columnar import ColumnarBatch
+from statusbrew_pipeline.table_schemas import FOLLOWER_DEMOGRAPHICS_SCHEMA
+
+
+class _Job:
+    def result(self):
+        return []
+
+
+class FakeBigQueryClient:
+    def __init__(self):
+        self.loads = []
+        self.queries = []
+        self.deleted = []
+        self.created = []
+
+    def create_table(self, table):
+        self.created.append(table)
+        return table
+
+    def load_table_from_file(self, file_obj, destination, job_config=None):
+        self.loads.append((destination, job_config, pq.read_table(io.BytesIO(file_obj.read()))))
+        return _Job()
+
+    def query(self, query, job_config=None):
+        self.queries.append((query, job_config))
+        return _Job()
+
+    def delete_table(self, table, not_found_ok=False):
+        self.deleted.append(table)
+
+
+def _service(client, **kwargs):
+    return BigQueryService(
+        project="proj",
+        dataset="ds",
+        table_profile_daily="profile_daily",
+        table_post_snapshots="post_snapshots",
+        table_demographics="demographics",
+        client=client,
+        **kwargs,
+    )
+
+
+def _profile_rows(count):
+    for i in range(count):
+        yield {
+            "date": date(2025, 3, 1),
+            "space_id": "s1",
+            "profile_id": f"p{i}",
+            "platform": "instagram",
+            "followers": i,
+        }
+
+
+def test_upsert_streams_parquet_chunks_with_schema_types():
+    client = FakeBigQueryClient()
+
+    assert _service(client, load_chunk_rows=2).upsert_profile_daily(_profile_rows(5)) == 5
+
+    assert [load[2].num_rows for load in client.loads] == [2, 2, 1]
+    assert len(client.created) == 1 and client.created[0].expires is not None
+    table = client.loads[0][2]
+    assert str(table.schema.field("date").type) == "date32[day]"
+    assert str(table.schema.field("followers").type) == "int64"
+    assert table.column("reach_total").null_count == 2
+    stamps = {load[2].column("created_at")[0].as_py() for load in client.loads}
+    assert len(stamps) == 1 and None not in stamps
+    assert len(client.queries) == 1
+    assert client.deleted == []
+
+
+def test_staging_table_is_dropped_when_first_load_fails():
+    client = FakeBigQueryClient()
+
+    def failing_load(file_obj, destination, job_config=None):
+        raise RuntimeError("load failed")
+
+    client.load_table_from_file = failing_load
+    with pytest.raises(RuntimeError):
+        _service(client).upsert_profile_daily(_profile_rows(2))
+
+    assert client.deleted == [f"proj.ds.{client.created[0].table_id}"]
+
+
+def test_upsert_skips_empty_input():
+    client = FakeBigQueryClient()
+    assert _service(client).upsert_post_snapshots(iter([])) == 0
+    assert client.loads == [] and client.queries == []
+
+
+def test_columnar_batch_null_fills_and_stamps_once():
+    batch = ColumnarBatch(FOLLOWER_DEMOGRAPHICS_SCHEMA)
+    batch.append({"snapshot_date": date(2025, 3, 1), "profile_id": "p1", "followers": 5})
+    batch.append({"snapshot_date": date(2025, 3, 1), "profile_id": "p2", "unknown": "ignored"})
+    stamp = datetime(2025, 3, 2, tzinfo=timezone.utc)
+
+    table = batch.to_arrow(stamp)
+
+    assert table.column("followers").to_pylist() == [5, None]
+    assert table.column("created_at").to_pylist() == [stamp, stamp]
+    assert batch.to_columns(stamp)["profile_id"] == ["p1", "p2"]
+
+
+def test_merge_is_pruned_to_staged_partitions():
+    client = FakeBigQueryClient()
+    _service(client).upsert_profile_daily(_profile_rows(3))
+
+    query, job_config = client.queries[0]
+    assert "T.date IN UNNEST(@partitions_0)" in query
+    assert job_config.query_parameters[0].values == [date(2025, 3, 1)]
+
+
+def test_partition_replace_mode_deletes_and_inserts_touched_partitions():
+    client = FakeBigQueryClient()
+    _service(client, partition_replace=["profile_daily"]).upsert_profile_daily(_profile_rows(3))
+
+    query, _ = client.queries[0]
+    assert "MERGE" not in query
+    assert "DELETE FROM `proj.ds.profile_daily` WHERE date IN UNNEST(@partitions_0);" in query
+
+
+def test_partition_replace_deletes_once_for_tables_staged_by_several_shards():
+    client = FakeBigQueryClient()
+    service = _service(client, partition_replace=["profile_daily"])
+
+    with service.write_batch() as batch:
+        for shard in range(2):
+            batch.adopt(PROFILE_DAILY, StagedTable(name=f"tmp_{shard}", row_count=1, partitions=[date(2025, 3, 1)]))
+
+    query, job_config = client.queries[0]
+    assert query.count("DELETE FROM `proj.ds.profile_daily`") == 1
+    assert query.index("DELETE FROM") < query.index("tmp_0") < query.index("tmp_1")
+    assert job_config.query_parameters[0].values == [date(2025, 3, 1)]
+
+
+def test_partial_write_batch_merges_into_partition_replace_tables():
+    client = FakeBigQueryClient()
+    service = _service(client, partition_replace=["profile_daily"])
+
+    with service.write_batch(partial=True) as batch:
+        batch.stage(PROFILE_DAILY, _profile_rows(2))
+
+    query, _ = client.queries[0]
+    assert "DELETE FROM" not in query
+    assert "MERGE `proj.ds.profile_daily`" in query
+
+
+def test_write_batch_commits_all_tables_in_one_script():
+    client = FakeBigQueryClient()
+    service = _service(client)
+    demographics = [{"snapshot_date": date(2025, 3, 2), "profile_id": "p1", "followers": 3}]
+
+    with service.write_batch() as batch:
+        batch.stage(PROFILE_DAILY, _profile_rows(2))
+        batch.stage(DEMOGRAPHICS, demographics)
+
+    assert len(client.queries) == 1
+    script, job_config = client.queries[0]
+    assert script.count("MERGE ") == 2
+    assert script.index("BEGIN TRANSACTION") < script.index("COMMIT TRANSACTION") < script.index("DROP TABLE")
+    assert [p.name for p in job_config.query_parameters] == ["partitions_0", "partitions_1"]
+
+
+def test_write_batch_discards_staging_tables_on_error():
+    client = FakeBigQueryClient()
+    try:
+        with _service(client).write_batch() as batch:
+            batch.stage(PROFILE_DAILY, _profile_rows(2))
+            raise RuntimeError("fetch failed")
+    except RuntimeError:
+        pass
+    assert client.queries == []
+    assert client.deleted == [f"proj.ds.{client.created[0].table_id}"]
+
+
+def test_write_batch_refreshes_touched_summary_months_in_transaction():
+    client = FakeBigQueryClient()
+    service = _service(client, table_monthly_summary="summary")
+    posts = [{"snapshot_date": date(2025, 3, 5), "post_id": "x", "profile_id": "p1"}]
+
+    with service.write_batch() as batch:
+        batch.stage(PROFILE_DAILY, _profile_rows(2))
+        batch.stage(POST_SNAPSHOTS, posts)
+
+    script, job_config = client.queries[0]
+    params = {p.name: p for p in job_config.query_parameters}
+    assert params["summary_months"].values == [date(2025, 2, 1), date(2025, 3, 1)]
+    assert params["summary_end"].value == date(2025, 3, 31)
+    assert script.index("DELETE FROM `proj.ds.summary`") < script.index("COMMIT TRANSACTION")
+    assert "date BETWEEN @summary_start AND @summary_end" in script
+
+
+def test_monthly_summary_disabled_without_table():
+    client = FakeBigQueryClient()
+    service = _service(client)
+    service.upsert_profile_daily(_profile_rows(1))
+
+    assert "summary" not in client.queries[0][0]
+    assert service.refresh_monthly_summary([date(2025, 3, 1)]) == []
+
+
+def test_demographics_history_mode_writes_changes_only():
+    client = FakeBigQueryClient()
+    service = _service(client, table_demographics_history="demographics_history")
+    demographics = [{"snapshot_date": date(2025, 3, 2), "profile_id": "p1", "age_group": "18-24", "followers": 3}]
+
+    assert service.upsert_demographics(demographics) == 1
+
+    script, _ = client.queries[0]
+    assert "MERGE" not in script and "`proj.ds.demographics`" not in script
+    close = script.index("UPDATE `proj.ds.demographics_history` AS T SET valid_to = P.snapshot_date")
+    open_ = script.index("INSERT INTO `proj.ds.demographics_history` (valid_from, valid_to,")
+    assert close < open_ < script.index("COMMIT TRANSACTION")
+    assert "S.followers IS NOT DISTINCT FROM T.followers" in script
+    assert "valid_from IN UNNEST(@partitions_0) AND valid_to <= valid_from" in script
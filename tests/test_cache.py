@@ -0,0 +1,35 @@
+import os
+import time
+
+from statusbrew_pipeline.cache import ResponseCache
+
+
+def _body(until):
+    return {"metrics": ["followers"], "dimensions": ["date", "profile"], "time_range": {"since": until, "until": until}}
+
+
+def test_only_closed_time_series_ranges_are_cacheable(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    assert cache.cacheable(_body("2025-03-01"))
+    assert not cache.cacheable(_body("2999-01-01"))
+    assert not cache.cacheable({**_body("2025-03-01"), "dimensions": ["post", "profile"]})
+    assert cache.key("s1", _body("2025-03-01")) != cache.key("s2", _body("2025-03-01"))
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=600)
+    payload = {"data": [{"value": os.urandom(64).hex()}]}
+    keys = [cache.key("s1", _body(f"2025-03-0{day}")) for day in range(1, 6)]
+
+    for index, key in enumerate(keys):
+        cache.put(key, payload)
+        time.sleep(0.01)
+        if index == 2:
+            assert cache.get(keys[0]) == payload
+            time.sleep(0.01)
+
+    assert cache.get(keys[0]) == payload
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[-1]) == payload
+    assert cache._size() <= 600
@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from statusbrew_pipeline.config import Settings
 
 
@@ -8,3 +11,33 @@ def test_space_ids_parse():
         statusbrew_access_token="token",
     )
     assert settings.space_ids == ["a", "b", "c"]
+
+
+def test_comma_separated_lists_from_env(monkeypatch):
+    monkeypatch.setenv("SPACE_IDS", "s1, s2")
+    monkeypatch.setenv("BQ_PARTITION_REPLACE_TABLES", "demographics")
+    monkeypatch.setenv("POST_MILESTONES", "7,30")
+    settings = Settings(gcp_project="proj", statusbrew_access_token="token")
+    assert settings.space_ids == ["s1", "s2"]
+    assert settings.bq_partition_replace_tables == ["demographics"]
+    assert settings.post_milestones == [7, 30]
+
+
+def test_milestone_table_requires_day7_milestone():
+    with pytest.raises(ValidationError, match="must include 7"):
+        Settings(gcp_project="proj", space_ids="s1", table_post_milestones="milestones", post_milestones="1,30")
+    assert Settings(gcp_project="proj", space_ids="s1", post_milestones="1,30").post_milestones == [1, 30]
+
+
+def test_milestones_must_fall_inside_the_fetch_window():
+    with pytest.raises(ValidationError, match="RECENT_POST_LOOKBACK_DAYS"):
+        Settings(gcp_project="proj", space_ids="s1", table_post_milestones="milestones", post_milestones="1,7,30")
+    settings = Settings(
+        gcp_project="proj",
+        space_ids="s1",
+        table_post_milestones="milestones",
+        post_milestones="1,7,30",
+        post_incremental_targeting=True,
+        post_tracking_days=30,
+    )
+    assert settings.post_milestones == [1, 7, 30]
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+from statusbrew_pipeline.extract import POST_SNAPSHOT_FIELDS, PROFILE_ID_FIELDS, RecordExtractor, parse_datetime
+
+
+def test_extractor_resolves_locations_per_shape():
+    extract = RecordExtractor(POST_SNAPSHOT_FIELDS)
+    nested = {"dimensions": {"post": "p1", "post_created_at": "2025-03-01T09:30:00Z"}, "metrics": {"post_reactions": 0}}
+    flat = {"post_id": "p2", "post_likes": 4, "post_reach": "12"}
+
+    first = extract(nested)
+    assert first["post_id"] == "p1"
+    assert first["likes"] == 0
+    assert first["post_published_at"] == datetime(2025, 3, 1, 9, 30, tzinfo=timezone.utc)
+    assert first["post_permalink"] == ""
+
+    second = extract(flat)
+    assert (second["post_id"], second["likes"], second["reach_total"]) == ("p2", 4, 12)
+    assert extract({**flat, "post_reactions": None})["likes"] == 4
+
+
+def test_profile_id_from_value_or_nested_profile():
+    extract = RecordExtractor(PROFILE_ID_FIELDS)
+
+    assert extract({"dimensions": {"profile": 42}})["profile_id"] == "42"
+    assert extract({"profile": {"uid": "p1"}})["profile_id"] == "p1"
+    assert extract({"profile_id": None, "profile": "p2"})["profile_id"] == "p2"
+    assert extract({"metrics": {"reach": 1}})["profile_id"] is None
+
+
+def test_parse_datetime_falls_back_to_dateutil():
+    assert parse_datetime("2025-03-01T09:30:00+09:00").utcoffset() == timedelta(hours=9)
+    assert parse_datetime("Mar 1 2025 09:30").day == 1
+    assert parse_datetime("not a date") is None
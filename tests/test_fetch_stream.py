@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from statusbrew_pipeline.fetch_stream import FetchStream
+from statusbrew_pipeline.statusbrew_client import StatusbrewClient
+
+
+def _client():
+    return StatusbrewClient(base_url="https://api.test", access_token="token", max_concurrency=2)
+
+
+def test_results_keep_call_order_and_a_bounded_window():
+    started = []
+
+    async def fetch(index):
+        started.append(index)
+        await asyncio.sleep(0.01 * (5 - index % 5))
+        return [{"index": index}]
+
+    with FetchStream(_client(), window=3) as stream:
+        results = stream.results([lambda client, i=i: fetch(i) for i in range(10)])
+        assert next(results) == [{"index": 0}]
+        assert len(started) <= 3
+        assert [records[0]["index"] for records in results] == list(range(1, 10))
+
+
+def test_records_stream_paginated_sources_in_order():
+    async def pages(index, count):
+        for offset in range(count):
+            if offset % 100 == 0:
+                await asyncio.sleep(0.001 * (3 - index))
+            yield {"source": index, "offset": offset}
+
+    with FetchStream(_client()) as stream:
+        chunks = list(stream.records([lambda client, i=i: pages(i, 1200) for i in range(3)]))
+
+    assert [(index, len(records)) for index, records in chunks] == [(i, n) for i in range(3) for n in (500, 500, 200)]
+    assert [record["offset"] for _, records in chunks[:3] for record in records] == list(range(1200))
+
+
+def test_a_failed_source_raises_in_the_consumer():
+    async def failing(client):
+        yield {"offset": 0}
+        raise RuntimeError("boom")
+
+    with FetchStream(_client()) as stream:
+        chunks = stream.records([failing])
+        with pytest.raises(RuntimeError, match="boom"):
+            next(chunks)
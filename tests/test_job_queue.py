@@ -0,0 +1,55 @@
+import threading
+import time
+
+from statusbrew_pipeline.job_queue import STATUS_FAILED, STATUS_SUCCEEDED, JobQueue, add_progress
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_identical_inflight_submissions_share_one_execution():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    runs = []
+
+    def run():
+        runs.append(1)
+        add_progress("rows_written", 3)
+        release.wait(5)
+        return {"row_count": 3}
+
+    first, created = queue.submit("profile_daily", ("profile_daily", "2025-03-01"), run)
+    second, created_again = queue.submit("profile_daily", ("profile_daily", "2025-03-01"), run)
+    release.set()
+    _wait(first)
+
+    assert (created, created_again) == (True, False)
+    assert second.job_id == first.job_id
+    assert runs == [1]
+    status = queue.get(first.job_id).to_dict()
+    assert status["status"] == STATUS_SUCCEEDED
+    assert status["progress"] == {"rows_written": 3}
+    assert status["result"] == {"row_count": 3}
+
+    third, created = queue.submit("profile_daily", ("profile_daily", "2025-03-01"), run)
+    _wait(third)
+    assert created and third.job_id != first.job_id
+    queue.shutdown()
+
+
+def test_failed_job_records_error():
+    queue = JobQueue(max_workers=1)
+
+    def run():
+        raise RuntimeError("boom")
+
+    job, _ = queue.submit("post_snapshots", ("post_snapshots", "2025-03-01"), run)
+    _wait(job)
+
+    assert job.status == STATUS_FAILED
+    assert job.to_dict()["error"] == "boom"
+    queue.shutdown()
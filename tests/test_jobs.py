@@ -0,0 +1,299 @@
+import json
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+
+from statusbrew_pipeline.config import Settings
+from statusbrew_pipeline.jobs import JobRunner
+from statusbrew_pipeline.sharding import Shard
+from statusbrew_pipeline.statusbrew_client import StatusbrewClient
+
+
+class RecordingBatch:
+    def __init__(self, bq):
+        self.bq = bq
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.bq.commits += 1
+
+    def stage(self, spec, rows):
+        return self.bq._record(spec.kind, rows)
+
+
+class RecordingBigQuery:
+    def __init__(self):
+        self.upserts = {}
+        self.commits = 0
+        self.known_posts = []
+        self.partial_batches = []
+
+    def _record(self, name, rows):
+        rows = list(rows)
+        self.upserts.setdefault(name, []).extend(rows)
+        return len(rows)
+
+    def recent_posts(self, lookback_days, as_of=None):
+        return self.known_posts
+
+    def latest_post_fingerprints(self, since, before):
+        return {}
+
+    def write_batch(self, partial=False):
+        self.partial_batches.append(partial)
+        return RecordingBatch(self)
+
+    def upsert_profile_daily(self, rows):
+        return self._record("profile_daily", rows)
+
+    def upsert_post_snapshots(self, rows):
+        return self._record("post_snapshots", rows)
+
+    def upsert_demographics(self, rows):
+        return self._record("demographics", rows)
+
+
+class SilentNotifier:
+    def notify(self, text):
+        pass
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    _handler.calls.append(request.url.path)
+    space_id = request.url.path.split("/")[3]
+    if request.url.path.endswith("/social_profiles"):
+        profiles = [
+            {"id": f"{space_id}-p{i}", "platform": "instagram", "username": f"user{i}"} for i in range(5)
+        ]
+        profiles.append({"id": f"{space_id}-fb", "platform": "facebook"})
+        return httpx.Response(200, json={"data": profiles})
+    body = json.loads(request.content)
+    if set(body["filters"]["profile_ids"]) & _handler.failing:
+        return httpx.Response(403, json={"error": "forbidden"})
+    if "post" in body["dimensions"]:
+        post_ids = body["filters"].get("post_ids") or [f"{p}:new" for p in body["filters"]["profile_ids"]]
+        posts = [
+            {
+                "post": post_id,
+                "profile": post_id.split(":")[0],
+                "post_created_at": "2025-02-22T10:00:00+00:00",
+                "metrics": {"post_reach": 5},
+            }
+            for post_id in post_ids
+        ]
+        return httpx.Response(200, json={"data": posts})
+    since = date.fromisoformat(body["time_range"]["since"])
+    until = date.fromisoformat(body["time_range"]["until"])
+    days = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+    rows = [
+        {"date": str(day), "profile": profile_id, "metrics": {"followers": len(profile_id), "reach": 10}}
+        for profile_id in reversed(body["filters"]["profile_ids"])
+        for day in days
+    ]
+    return httpx.Response(200, json={"data": rows})
+
+
+def _runner(bq, **overrides):
+    _handler.calls = []
+    _handler.failing = set()
+    settings = Settings(gcp_project="proj", space_ids="s1,s2", statusbrew_access_token="token", **overrides)
+    client = StatusbrewClient(
+        base_url="https://api.test",
+        access_token="token",
+        max_concurrency=3,
+        max_concurrency_per_space=2,
+        transport=httpx.MockTransport(_handler),
+    )
+    return JobRunner(settings, client, bq, SilentNotifier())
+
+
+def test_profile_daily_fans_out_in_deterministic_order():
+    bq = RecordingBigQuery()
+    result = _runner(bq).run_profile_daily(date(2025, 3, 1))
+
+    rows = bq.upserts["profile_daily"]
+    assert result["row_count"] == 10
+    assert [row["profile_id"] for row in rows] == [f"{s}-p{i}" for s in ("s1", "s2") for i in range(5)]
+    assert rows[0]["reach_total"] == 10
+
+
+def test_profile_daily_batches_profiles_and_splits_by_profile():
+    bq = RecordingBigQuery()
+    _runner(bq, insights_profile_batch_size=2).run_profile_daily(date(2025, 3, 1))
+
+    rows = bq.upserts["profile_daily"]
+    assert [row["profile_id"] for row in rows] == [f"{s}-p{i}" for s in ("s1", "s2") for i in range(5)]
+    assert sum(path.endswith("/insights") for path in _handler.calls) == 6
+
+
+def test_profile_jobs_stage_responses_before_every_request_is_sent():
+    class StreamingBigQuery(RecordingBigQuery):
+        def _record(self, name, rows):
+            rows = iter(rows)
+            first = next(rows)
+            self.requests_at_first_row = sum(path.endswith("/insights") for path in _handler.calls)
+            return super()._record(name, [first, *rows])
+
+    for run in ("run_profile_daily", "run_follower_demographics"):
+        bq = StreamingBigQuery()
+        getattr(_runner(bq, insights_profile_batch_size=1), run)(date(2025, 3, 1))
+
+        # The client allows 3 requests in flight, so the stream keeps at most 6 ahead of staging.
+        assert bq.requests_at_first_row <= 6
+        assert sum(path.endswith("/insights") for path in _handler.calls) == 10
+        assert sum(len(rows) for rows in bq.upserts.values()) == 10
+
+
+def test_backfill_uses_one_request_per_profile_window():
+    bq = RecordingBigQuery()
+    runner = _runner(bq, backfill_window_days=7)
+
+    result = runner.run_backfill(date(2025, 3, 1), date(2025, 3, 10))
+
+    assert result["windows"] == 2
+    assert result["row_count"] == 10 * 10
+    assert sum(path.endswith("/insights") for path in _handler.calls) == 10 * 2
+    assert len({row["date"] for row in bq.upserts["profile_daily"]}) == 10
+    assert bq.commits == 1
+
+
+def test_post_snapshots_skip_unchanged_rows(tmp_path):
+    bq = RecordingBigQuery()
+    runner = _runner(bq, post_snapshot_skip_unchanged=True, fingerprint_index_path=str(tmp_path / "fp.json"))
+
+    first = runner.run_post_snapshots(date(2025, 3, 1))
+    second = runner.run_post_snapshots(date(2025, 3, 2))
+
+    assert (first["row_count"], first["skipped_unchanged"]) == (10, 0)
+    assert (second["row_count"], second["skipped_unchanged"]) == (0, 10)
+    assert (tmp_path / "fp.json").exists()
+
+
+def test_unchanged_day7_post_snapshots_are_still_written(tmp_path):
+    bq = RecordingBigQuery()
+    runner = _runner(bq, post_snapshot_skip_unchanged=True, post_milestones="1,3")
+
+    runner.run_post_snapshots(date(2025, 2, 28))
+    day7 = runner.run_post_snapshots(date(2025, 3, 1))
+    day8 = runner.run_post_snapshots(date(2025, 3, 2))
+
+    assert (day7["row_count"], day7["skipped_unchanged"]) == (10, 0)
+    assert (day8["row_count"], day8["skipped_unchanged"]) == (0, 10)
+
+
+def test_post_snapshots_rerun_and_backfill_write_rows(tmp_path):
+    bq = RecordingBigQuery()
+    runner = _runner(bq, post_snapshot_skip_unchanged=True, fingerprint_index_path=str(tmp_path / "fp.json"))
+
+    runner.run_post_snapshots(date(2025, 3, 2))
+    rerun = runner.run_post_snapshots(date(2025, 3, 2))
+    backfill = runner.run_post_snapshots(date(2025, 3, 1))
+    later = runner.run_post_snapshots(date(2025, 3, 3))
+
+    assert (rerun["row_count"], rerun["skipped_unchanged"]) == (10, 0)
+    assert (backfill["row_count"], backfill["skipped_unchanged"]) == (10, 0)
+    assert (later["row_count"], later["skipped_unchanged"]) == (0, 10)
+
+
+def test_incremental_post_targeting_skips_aged_out_posts():
+    bq = RecordingBigQuery()
+    bq.known_posts = [
+        {"post_id": "s1-p0:old", "profile_id": "s1-p0", "space_id": "s1", "post_published_at": datetime(2025, 2, 20)},
+        {"post_id": "s1-p1:old", "profile_id": "s1-p1", "space_id": "s1", "post_published_at": datetime(2025, 2, 25)},
+        {"post_id": "s1-p2:aged", "profile_id": "s1-p2", "space_id": "s1", "post_published_at": datetime(2024, 12, 1)},
+        {"post_id": "s1-p3:new", "profile_id": "s1-p3", "space_id": "s1", "post_published_at": datetime(2025, 2, 28)},
+    ]
+    runner = _runner(bq, post_incremental_targeting=True, post_tracking_days=30, post_discovery_days=3)
+
+    result = runner.run_post_snapshots(date(2025, 3, 1))
+
+    post_ids = [row["post_id"] for row in bq.upserts["post_snapshots"]]
+    assert result["tracked_posts"] == 2
+    assert result["requests"] == 3
+    assert "s1-p2:aged" not in post_ids
+    assert {"s1-p0:old", "s1-p1:old"} <= set(post_ids)
+    assert len(post_ids) == len(set(post_ids)) == 12
+
+
+def test_uncached_profiles_are_listed_once_per_space_per_run():
+    bq = RecordingBigQuery()
+    bq.known_posts = [
+        {"post_id": "s1-p0:old", "profile_id": "s1-p0", "space_id": "s1", "post_published_at": datetime(2025, 2, 20)},
+    ]
+    runner = _runner(bq, profile_cache_ttl_seconds=0, post_incremental_targeting=True)
+
+    runner.run_post_snapshots(date(2025, 3, 1))
+
+    assert len(bq.upserts["post_snapshots"]) == 11
+    assert sum(path.endswith("/social_profiles") for path in _handler.calls) == 2
+    assert all(row["profile_username"] for row in bq.upserts["post_snapshots"])
+
+
+def test_post_milestones_are_kept_when_snapshots_are_unchanged(tmp_path):
+    bq = RecordingBigQuery()
+    runner = _runner(
+        bq,
+        table_post_milestones="milestones",
+        post_snapshot_skip_unchanged=True,
+        fingerprint_index_path=str(tmp_path / "fp.json"),
+    )
+
+    runner.run_post_snapshots(date(2025, 2, 28))
+    second = runner.run_post_snapshots(date(2025, 3, 1))
+    later = runner.run_post_snapshots(date(2025, 3, 2))
+
+    assert (second["row_count"], second["milestone_rows"]) == (10, 10)
+    assert (later["row_count"], later["milestone_rows"]) == (0, 0)
+    assert {row["milestone_day"] for row in bq.upserts["post_milestones"]} == {7}
+    assert len(bq.upserts["post_milestones"]) == 10
+
+
+def test_profile_daily_resumes_from_checkpoints(tmp_path):
+    bq = RecordingBigQuery()
+    runner = _runner(bq, checkpoint_path=str(tmp_path / "checkpoints.sqlite"), checkpoint_flush_profiles=4)
+    _handler.failing = {"s2-p3"}
+
+    with pytest.raises(RuntimeError, match="1 of 10 profiles failed"):
+        runner.run_profile_daily(date(2025, 3, 1))
+    assert len(bq.upserts["profile_daily"]) == 9
+    assert bq.commits == 3
+
+    _handler.failing = set()
+    _handler.calls = []
+    result = runner.run_profile_daily(date(2025, 3, 1))
+
+    assert (result["row_count"], result["resumed_profiles"]) == (1, 9)
+    assert sum(path.endswith("/insights") for path in _handler.calls) == 1
+    assert runner.checkpoints.completed("profile_daily", date(2025, 3, 1)) == set()
+
+
+def test_checkpoint_chunks_and_shard_runs_write_partial_batches(tmp_path):
+    bq = RecordingBigQuery()
+    _runner(bq).run_profile_daily(date(2025, 3, 1))
+    _runner(bq).run_follower_demographics(date(2025, 3, 1), shard=Shard(0, 2))
+    _runner(bq, checkpoint_path=str(tmp_path / "checkpoints.sqlite"), checkpoint_flush_profiles=4).run_profile_daily(
+        date(2025, 3, 1)
+    )
+
+    assert bq.partial_batches == [False, True, True, True, True]
+
+
+def test_daily_run_shares_one_profile_pass_and_one_write():
+    bq = RecordingBigQuery()
+    result = _runner(bq).run_daily(date(2025, 3, 2))
+
+    assert bq.commits == 1
+    assert [path for path in _handler.calls if path.endswith("/social_profiles")] == [
+        "/v1/spaces/s1/social_profiles",
+        "/v1/spaces/s2/social_profiles",
+    ]
+    assert {row["date"] for row in bq.upserts["profile_daily"]} == {date(2025, 3, 1)}
+    assert len(bq.upserts["post_snapshots"]) == len(bq.upserts["demographics"]) == 10
+    assert result["requests"] == 10 + 10 + 2
+    assert [job["row_count"] for job in result["jobs"].values()] == [10, 10, 10]
+    assert result["row_count"] == 30
+    assert "transform_seconds" in result["jobs"]["follower_demographics"]["timings"]
+    assert result["timings"]["http_requests"] == len(_handler.calls)
@@ -0,0 +1,32 @@
+from datetime import date
+
+from prometheus_client import REGISTRY, generate_latest
+
+from test_bq import FakeBigQueryClient, _service
+from test_jobs import _runner
+
+
+def test_job_payload_summarises_stage_timings_and_exports_histograms():
+    runner = _runner(_service(FakeBigQueryClient()))
+
+    result = runner.run_profile_daily(date(2025, 3, 1))
+
+    timings = result["timings"]
+    assert timings["http_requests"] == 12
+    assert {"fetch_seconds", "transform_seconds", "bq_load_seconds", "bq_merge_seconds"} <= set(timings)
+    assert timings["bq_bytes_processed"] == 0
+    exported = generate_latest(REGISTRY).decode()
+    assert 'statusbrew_request_seconds_count{endpoint="insights",method="POST",status="200"}' in exported
+    assert 'pipeline_stage_seconds_count{job="profile_daily",stage="bq_merge"}' in exported
+
+
+def test_post_snapshot_timings_include_fetch():
+    runner = _runner(_service(FakeBigQueryClient()))
+
+    result = runner.run_post_snapshots(date(2025, 3, 1))
+
+    timings = result["timings"]
+    assert timings["http_requests"] == 4
+    assert {"fetch_seconds", "transform_seconds", "bq_load_seconds", "bq_merge_seconds"} <= set(timings)
+    exported = generate_latest(REGISTRY).decode()
+    assert 'pipeline_stage_seconds_count{job="post_snapshots",stage="fetch"}' in exported
@@ -0,0 +1,34 @@
+from statusbrew_pipeline.profiles import ProfileRegistry
+
+
+class CountingStatusbrew:
+    def __init__(self):
+        self.calls = 0
+
+    def list_profiles(self, space_id):
+        self.calls += 1
+        return [
+            {"profile_id": "1", "platform_type": "instagram", "handle": "alpha"},
+            {"uid": 2, "platform": "instagram", "name": "beta"},
+            {"id": "3", "platform": "facebook"},
+            {"platform": "instagram"},
+        ]
+
+
+def test_registry_caches_until_ttl_and_invalidation():
+    now = [0.0]
+    statusbrew = CountingStatusbrew()
+    registry = ProfileRegistry(statusbrew, ttl_seconds=60, clock=lambda: now[0])
+
+    profiles = registry.instagram_profiles("s1")
+    assert [(p.profile_id, p.username) for p in profiles] == [("1", "alpha"), ("2", "beta")]
+    assert registry.get("s1", 2).username == "beta"
+    assert statusbrew.calls == 1
+
+    now[0] = 61
+    registry.instagram_profiles("s1")
+    assert statusbrew.calls == 2
+
+    registry.invalidate("s1")
+    registry.instagram_profiles("s1")
+    assert statusbrew.calls == 3
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from statusbrew_pipeline import secrets
+from statusbrew_pipeline.config import Settings
+from statusbrew_pipeline.services import Services
+
+# Generous enough for a loaded CI machine; a regression back to eager setup
+# (BigQuery import, Secret Manager call) blows well past it.
+IMPORT_BUDGET_SECONDS = 3.0
+FIRST_REQUEST_BUDGET_SECONDS = 0.5
+
+_COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from statusbrew_pipeline import main
+imported = time.perf_counter() - start
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    start = time.perf_counter()
+    status = client.get("/healthz").status_code
+    first_request = time.perf_counter() - start
+print(json.dumps({
+    "imported": imported,
+    "first_request": first_request,
+    "status": status,
+    "heavy": sorted(m for m in ("google.cloud.bigquery", "google.cloud.secretmanager", "statusbrew_pipeline.jobs")
+                    if m in sys.modules),
+}))
+"""
+
+
+def test_cold_start_defers_clients_and_meets_latency_budget():
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = {
+        **os.environ,
+        "PYTHONPATH": src,
+        "GCP_PROJECT": "proj",
+        "SPACE_IDS": "s1",
+        "STATUSBREW_ACCESS_TOKEN": "",
+        "STATUSBREW_TOKEN_SECRET_NAME": "statusbrew-token",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", _COLD_START], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+
+    assert report["status"] == 200
+    assert report["heavy"] == []
+    assert report["imported"] < IMPORT_BUDGET_SECONDS
+    assert report["first_request"] < FIRST_REQUEST_BUDGET_SECONDS
+
+
+def test_components_are_built_once_across_threads(monkeypatch):
+    builds = []
+
+    def slow_token(self):
+        builds.append(threading.get_ident())
+        time.sleep(0.05)
+        return "token"
+
+    monkeypatch.setattr(Services, "_build_statusbrew_token", slow_token)
+    services = Services(Settings(gcp_project="proj", space_ids="s1"))
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(services.statusbrew_client)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(client) for client in clients}) == 1
+    services.close()
+
+
+def test_failed_secret_fetch_is_retried_on_next_use(monkeypatch):
+    attempts = []
+
+    def flaky_fetch(name, project_id=None):
+        attempts.append((name, project_id))
+        if len(attempts) == 1:
+            raise ConnectionError("secret manager unavailable")
+        return "token"
+
+    monkeypatch.setattr(secrets, "fetch_secret", flaky_fetch)
+    services = Services(
+        Settings(
+            gcp_project="proj",
+            space_ids="s1",
+            statusbrew_access_token="",
+            statusbrew_token_secret_name="statusbrew-token",
+        )
+    )
+
+    with pytest.raises(ConnectionError):
+        services.statusbrew_token
+    assert services.built("statusbrew_token") is None
+    assert services.statusbrew_token == "token"
+    assert attempts == [("statusbrew-token", "proj")] * 2
@@ -0,0 +1,63 @@
+from datetime import date
+
+import httpx
+import pytest
+
+from statusbrew_pipeline.sharding import Shard, ShardCoordinator, shard_of
+from test_bq import FakeBigQueryClient, _service
+from test_jobs import _runner
+
+
+def test_shards_partition_profiles_stably():
+    profiles = [("s1", f"p{i}") for i in range(200)]
+    shards = [Shard(index, 4) for index in range(4)]
+
+    owners = [[shard.index for shard in shards if shard.contains(*profile)] for profile in profiles]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert {owner[0] for owner in owners} == {0, 1, 2, 3}
+    assert shard_of("s1", "p7", 4) == shard_of("s1", "p7", 4)
+    with pytest.raises(ValueError):
+        Shard(4, 4)
+
+
+def test_shard_runs_stage_and_coordinator_merges_once():
+    client = FakeBigQueryClient()
+    runner = _runner(_service(client))
+    day = date(2025, 3, 1)
+
+    results = [runner.run_shard("profile_daily", day, Shard(index, 3)) for index in range(3)]
+    assert client.queries == []
+    assert sum(result["row_count"] for result in results) == 10
+
+    merged = runner.commit_shards("profile_daily", day, results)
+
+    assert merged["row_count"] == 10
+    assert len(client.queries) == 1
+    assert client.queries[0][0].count("MERGE ") == merged["staged_tables"]
+
+
+def test_failed_shard_discards_the_others():
+    client = FakeBigQueryClient()
+    runner = _runner(_service(client))
+    day = date(2025, 3, 1)
+    results = [runner.run_shard("profile_daily", day, Shard(0, 2)), RuntimeError("shard 1 down")]
+
+    with pytest.raises(RuntimeError, match="1 of 2 shards"):
+        runner.commit_shards("profile_daily", day, results)
+
+    assert client.queries == []
+    assert client.deleted == [f"proj.ds.{table['name']}" for table in results[0]["staged"]]
+
+
+def test_coordinator_returns_shard_failures():
+    def handler(request):
+        if request.url.params["shard_index"] == "1":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"row_count": 1, "staged": []})
+
+    coordinator = ShardCoordinator("https://svc.test", transport=httpx.MockTransport(handler))
+    results = coordinator.run("profile_daily", date(2025, 3, 1), 2)
+
+    assert results[0] == {"row_count": 1, "staged": []}
+    assert isinstance(results[1], httpx.HTTPStatusError)
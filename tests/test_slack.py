@@ -0,0 +1,58 @@
+import json
+import threading
+import time
+
+import httpx
+
+from statusbrew_pipeline.slack import SlackNotifier
+
+
+def _recording_transport(posts, release=None):
+    def handler(request):
+        if release is not None:
+            release.wait(5)
+        posts.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    return httpx.MockTransport(handler)
+
+
+def test_messages_within_window_are_posted_once_on_close():
+    posts = []
+    notifier = SlackNotifier(
+        "https://hooks.test/x", channel="#ops", coalesce_seconds=5, transport=_recording_transport(posts)
+    )
+
+    for index in range(3):
+        notifier.notify(f"message {index}")
+    notifier.close()
+
+    assert posts == [{"text": "message 0\nmessage 1\nmessage 2", "channel": "#ops"}]
+
+
+def test_notify_does_not_wait_for_slack_and_drops_when_full():
+    posts = []
+    release = threading.Event()
+    notifier = SlackNotifier(
+        "https://hooks.test/x", max_queue=2, coalesce_seconds=0, transport=_recording_transport(posts, release)
+    )
+
+    start = time.perf_counter()
+    notifier.notify("first")
+    time.sleep(0.1)  # the sender is now blocked posting "first"
+    for index in range(5):
+        notifier.notify(f"queued {index}")
+    elapsed = time.perf_counter() - start
+    release.set()
+    notifier.close()
+
+    assert elapsed < 1
+    assert [post["text"] for post in posts] == ["first", "queued 0\nqueued 1"]
+
+
+def test_unconfigured_notifier_starts_no_sender():
+    notifier = SlackNotifier(None)
+    notifier.notify("ignored")
+    notifier.close()
+
+    assert notifier._thread is None
@@ -0,0 +1,111 @@
+import json
+from concurrent.futures import Future
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from tenacity import wait_fixed
+
+from statusbrew_pipeline.cache import ResponseCache
+from statusbrew_pipeline.ratelimit import TokenBucket
+from statusbrew_pipeline.statusbrew_client import (
+    StatusbrewClient,
+    StatusbrewError,
+    StatusbrewRetryableError,
+    wait_retry_after,
+)
+
+
+def _client(handler, retries=3):
+    return StatusbrewClient(
+        base_url="https://api.test",
+        access_token="token",
+        retries=retries,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_retries_429_using_retry_after():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.01"})
+        return httpx.Response(200, json={"data": [{"id": "p1"}]})
+
+    assert _client(handler).list_profiles("s1") == [{"id": "p1"}]
+    assert len(calls) == 2
+
+
+def test_zero_retry_after_falls_back_to_backoff():
+    wait = wait_retry_after(wait_fixed(2))
+
+    def state(retry_after):
+        outcome = Future()
+        outcome.set_exception(StatusbrewRetryableError("503", 503, retry_after))
+        return SimpleNamespace(outcome=outcome)
+
+    assert wait(state(0.0)) == 2
+    assert wait(state(None)) == 2
+    assert wait(state(0.5)) == 0.5
+
+
+def test_client_errors_fail_fast():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(403, json={"error": "forbidden"})
+
+    with pytest.raises(StatusbrewError) as excinfo:
+        _client(handler).list_profiles("s1")
+    assert excinfo.value.status_code == 403
+    assert len(calls) == 1
+
+
+def test_token_bucket_spaces_requests_and_honours_pause():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_second=2, burst=2, clock=lambda: now[0])
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+    bucket.observe({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "30"})
+    assert bucket.reserve() == pytest.approx(30.0)
+
+
+def test_iter_insights_follows_cursors_lazily():
+    bodies = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        bodies.append(body)
+        if "cursor" not in body:
+            return httpx.Response(200, json={"data": [{"n": 1}, {"n": 2}], "paging": {"next_cursor": "c2"}})
+        return httpx.Response(200, json={"data": [{"n": 3}], "paging": {"next_cursor": None}})
+
+    rows = _client(handler).iter_insights("s1", ["post_reach"], ["post"], {"since": "2025-03-01", "until": "2025-03-02"})
+    assert next(rows) == {"n": 1}
+    assert len(bodies) == 1
+    assert [row["n"] for row in rows] == [2, 3]
+    assert bodies[1]["cursor"] == "c2"
+
+
+def test_closed_range_insights_replay_from_cache(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": [{"date": "2025-03-01", "metrics": {"followers": 1}}]})
+
+    cache = ResponseCache(str(tmp_path))
+    client = StatusbrewClient(
+        base_url="https://api.test", access_token="token", transport=httpx.MockTransport(handler), cache=cache
+    )
+    first = client.fetch_profile_daily_metrics("s1", ["p1"], date(2025, 3, 1))
+    second = client.fetch_profile_daily_metrics("s1", ["p1"], date(2025, 3, 1))
+    client.fetch_profile_daily_metrics("s1", ["p1"], date.today() + timedelta(days=1))
+    client.fetch_profile_daily_metrics("s1", ["p1"], date.today() + timedelta(days=1))
+
+    assert first == second
+    assert len(calls) == 3